@@ -0,0 +1,66 @@
+import asyncio
+import threading
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from toollib.guid import AsyncRedisUid, RedisUid  # noqa: E402
+from toollib.rediscli import RedisCli  # noqa: E402
+
+
+def _redis_cli():
+    return RedisCli(
+        connection_class=getattr(fakeredis, "FakeRedisConnection", fakeredis.FakeConnection),
+        server=fakeredis.FakeServer(),
+    )
+
+
+def test_failed_refill_backs_off_to_sync_fetch(monkeypatch):
+    ruid = RedisUid(_redis_cli(), seq_name="s", prefetch=10, date_fmt=None)
+    assert ruid.gen_uid() == "000000001"
+    fetch, calls, errors = ruid._fetch_segment, [], []
+    monkeypatch.setattr(threading, "excepthook", errors.append)
+
+    def _failing_fetch():
+        calls.append(1)
+        raise ConnectionError("redis down")
+
+    ruid._fetch_segment = _failing_fetch
+    for _ in range(9):
+        ruid.gen_uid()
+        for t in threading.enumerate():
+            if t is not threading.current_thread() and t.daemon:
+                t.join(1)
+    # 后台预取只尝试一次，且不抛出线程异常
+    assert len(calls) == 1
+    assert isinstance(ruid._refill_error, ConnectionError)
+    assert errors == []
+    with pytest.raises(ConnectionError):
+        ruid.gen_uid()
+    ruid._fetch_segment = fetch
+    assert ruid.gen_uid() == "000000011"
+    assert ruid._refill_error is None
+
+
+def test_async_failed_refill_backs_off_to_sync_fetch():
+    async def _main():
+        ruid = AsyncRedisUid(fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer()), seq_name="s", prefetch=10)
+        ruid.date_fmt = None
+        await ruid.gen_uid()
+        calls = []
+
+        async def _failing_fetch():
+            calls.append(1)
+            raise ConnectionError("redis down")
+
+        ruid._fetch_segment = _failing_fetch
+        for _ in range(9):
+            await ruid.gen_uid()
+            await asyncio.sleep(0)
+        assert len(calls) == 1
+        assert ruid._refill_task.done() and ruid._refill_task.exception() is None
+        with pytest.raises(ConnectionError):
+            await ruid.gen_uid()
+
+    asyncio.run(_main())
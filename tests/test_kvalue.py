@@ -0,0 +1,106 @@
+import sqlite3
+
+import pytest
+
+from toollib.kvalue import KValue
+
+
+def _legacy_file(path):
+    """旧版本的数据文件：text列、JSON文本、无编码标记列"""
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("create table kvalue (key text not null primary key, value text, expire real)")
+        conn.executemany(
+            "insert into kvalue (key, value, expire) values (?,?,?)",
+            [("a", '{"x": [1, 2]}', 0.0), ("b", '"hi"', 0.0), ("n", None, 0.0)],
+        )
+    conn.close()
+    return str(path)
+
+
+def test_set_overwrites(tmp_path):
+    kv = KValue(file=str(tmp_path / "new.kv"))
+    for i in range(3):
+        kv.set("a", i)
+    assert kv.count() == 1
+    assert kv.get("a") == 2
+    assert list(kv.keys()) == ["a"]
+    kv.close()
+
+
+def test_migrate_then_overwrite(tmp_path):
+    kv = KValue(file=_legacy_file(tmp_path / "old.kv"), codec="msgpack")
+    assert kv.get("a") == {"x": [1, 2]}
+    assert kv.migrate(batch_size=1) == 2
+    assert kv._table_columns()["value"] == "blob"
+    assert kv.get("a") == {"x": [1, 2]}
+    assert kv.get("n") is None
+    kv.set("b", "one")
+    kv.set("b", "two")
+    assert kv.get("b") == "two"
+    assert kv.count() == 3
+    assert kv.fetchone("select count(*) from kvalue where key = 'b'") == (1,)
+    kv.close()
+
+
+def test_group_commit_survives_non_sqlite_error(tmp_path):
+    kv = KValue(file=str(tmp_path / "group.kv"), group_commit=True)
+    kv.set("a", 1)
+    try:
+        kv.execute("insert into kvalue (key, value) values ('big', ?)", (2**70,))
+    except OverflowError:
+        pass
+    else:
+        raise AssertionError("OverflowError expected")
+    assert kv.set("b", 2) == 1
+    assert kv.get_many(["a", "b", "big"]) == {"a": 1, "b": 2, "big": None}
+    kv.close()
+
+
+def test_thread_local_releases_dead_threads(tmp_path):
+    import gc
+    import threading
+
+    kv = KValue(file=str(tmp_path / "local.kv"), thread_local=True)
+    for i in range(50):
+        t = threading.Thread(target=kv.set, args=(f"k{i}", i))
+        t.start()
+        t.join()
+    gc.collect()
+    assert len(kv._conns) <= 2
+    assert kv.count() == 50
+    kv.close()
+    assert kv._conns == []
+
+
+def test_pickle_rows_rejected_unless_allowed(tmp_path):
+    file = str(tmp_path / "p.kv")
+    KValue(file=file, codec="pickle").set("a", {1, 2})
+    kv = KValue(file=file)
+    with pytest.raises(ValueError):
+        kv.get("a")
+    with pytest.raises(ValueError):
+        kv.get_many(["a"])
+    with pytest.raises(ValueError):
+        list(kv.items())
+    assert KValue(file=file, allow_pickle=True).get("a") == {1, 2}
+
+
+def test_get_many_reads_one_snapshot(tmp_path, monkeypatch):
+    file = str(tmp_path / "s.kv")
+    kv = KValue(file=file, profile="performance")
+    writer = KValue(file=file, profile="performance")
+    kv.set_many({"a": 1, "b": 1})
+    chunks = KValue._chunks
+
+    def _chunks(self, keys):
+        # 分块之间由其他连接写入
+        for i, chunk in enumerate(chunks(self, keys)):
+            if i == 1:
+                writer.set_many({"a": 2, "b": 2})
+            yield chunk
+
+    monkeypatch.setattr(KValue, "_max_variables", 1)
+    monkeypatch.setattr(KValue, "_chunks", _chunks)
+    assert kv.get_many(["a", "b"]) == {"a": 1, "b": 1}
+    assert kv.get_many(["a", "b"]) == {"a": 2, "b": 2}
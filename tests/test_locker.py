@@ -0,0 +1,77 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from toollib.locker import AsyncLocker, Locker  # noqa: E402
+from toollib.rediscli import RedisCli  # noqa: E402
+
+
+def _redis_cli(**kwargs):
+    return RedisCli(
+        connection_class=getattr(fakeredis, "FakeRedisConnection", fakeredis.FakeConnection),
+        server=fakeredis.FakeServer(),
+        **kwargs,
+    )
+
+
+def test_poll_release_wakes_notify_waiter():
+    redis_cli = _redis_cli()
+    holder = Locker(redis_cli, lock_name="lk", wait_mode="poll")
+    waiter = Locker(redis_cli, lock_name="lk", wait_mode="notify", acquire_timeout=5, max_backoff=3)
+    assert holder.acquire()
+    timer = threading.Timer(1.2, holder.release)
+    timer.start()
+    start = time.perf_counter()
+    assert waiter.acquire()
+    # 由释放通知唤醒，而非等到退避间隔
+    assert time.perf_counter() - start < 1.8
+    waiter.release()
+    timer.join()
+
+
+def test_watchdog_lost_lock_resets_state():
+    redis_cli = _redis_cli()
+    lost = []
+    locker = Locker(redis_cli, lock_name="lk", timeout=1, watchdog=True, renew_ratio=0.1, on_lost=lost.append)
+    assert locker.acquire()
+    first = locker._watchdog_stop
+    redis_cli.delete("lk")
+    assert locker.lost.wait(2)
+    assert lost == [locker]
+    assert locker.is_lock is False
+    assert locker.hold_count == 0
+    assert locker._watchdog_stop is None
+    # 重新获取：启动新的看门狗并持续续期
+    assert locker.acquire()
+    assert locker._watchdog_stop is not None and locker._watchdog_stop is not first
+    assert not locker.lost.is_set()
+    time.sleep(1.5)
+    assert redis_cli.get("lk") == locker.lock_value.encode()
+    locker.release()
+
+
+def test_async_watchdog_lost_lock_resets_state():
+    async def _main():
+        redis_cli = fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer())
+        locker = AsyncLocker(redis_cli, lock_name="lk", timeout=1, watchdog=True, renew_ratio=0.1)
+        assert await locker.acquire()
+        first = locker._watchdog_stop
+        await redis_cli.delete("lk")
+        for _ in range(40):
+            if locker.lost.is_set():
+                break
+            await asyncio.sleep(0.05)
+        assert locker.lost.is_set()
+        assert locker.is_lock is False
+        assert locker._watchdog_stop is None
+        assert await locker.acquire()
+        assert locker._watchdog_stop is not None and locker._watchdog_stop is not first
+        await asyncio.sleep(1.5)
+        assert await redis_cli.get("lk") == locker.lock_value.encode()
+        await locker.release()
+
+    asyncio.run(_main())
@@ -0,0 +1,110 @@
+import threading
+import time
+
+import pytest
+from redis.exceptions import ConnectionError, DataError
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from toollib.rediscli import RedisCli  # noqa: E402
+
+
+def _redis_cli(**kwargs):
+    return RedisCli(
+        connection_class=getattr(fakeredis, "FakeRedisConnection", fakeredis.FakeConnection),
+        server=fakeredis.FakeServer(),
+        **kwargs,
+    )
+
+
+def test_transaction_batch_is_all_or_nothing():
+    redis_cli = _redis_cli()
+    redis_cli.set("a", 1)
+    batch = redis_cli.batch(transaction=True)
+    futures = [batch.set("a", 1), batch.set("x", object()), batch.incr("a")]
+    with pytest.raises(DataError):
+        batch.execute()
+    assert redis_cli.get("a") == b"1"
+    assert all(isinstance(f.exception(), Exception) for f in futures)
+
+
+def test_non_transaction_batch_isolates_errors():
+    redis_cli = _redis_cli()
+    batch = redis_cli.batch()
+    batch.set("a", 1)
+    batch.set("x", object())
+    batch.incr("a")
+    results = batch.execute()
+    assert results[0] is True
+    assert isinstance(results[1], Exception)
+    assert results[2] == 2
+
+
+def test_auto_batch_isolates_errors_between_threads():
+    redis_cli = _redis_cli(auto_batch=True, batch_window=0.02)
+    out = {}
+
+    def _set(key, value):
+        try:
+            out[key] = redis_cli.set(key, value)
+        except Exception as e:
+            out[key] = e
+
+    threads = [threading.Thread(target=_set, args=(f"k{i}", i)) for i in range(5)]
+    threads.append(threading.Thread(target=_set, args=("bad", object())))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert isinstance(out.pop("bad"), Exception)
+    assert all(v is True for v in out.values())
+
+
+def test_near_cache_invalidated_by_own_writes():
+    redis_cli = _redis_cli(near_cache=True, near_cache_mode="channel")
+    assert redis_cli.near_cache._ready.wait(5)
+    redis_cli.set("conf:x", "1")
+    assert redis_cli.get("conf:x") == b"1"
+    assert redis_cli.get("conf:x") == b"1"
+    redis_cli.set("conf:x", "2")
+    assert redis_cli.get("conf:x") == b"2"
+    redis_cli.delete("conf:x")
+    assert redis_cli.get("conf:x") is None
+
+
+def test_near_cache_tracking_retry_does_not_leak_pool():
+    # fakeredis不支持CLIENT TRACKING：持续重连，但不应占用连接池
+    redis_cli = _redis_cli(max_connections=4, near_cache=True)
+    time.sleep(1.6)
+    redis_cli.set("a", 1)
+    assert redis_cli.get("a") == b"1"
+    assert redis_cli.pool_stats()["created"] <= 2
+    stats = redis_cli.near_cache.stats()
+    assert stats["ready"] is False
+    assert stats["last_error"]
+
+
+def test_metrics_record_checkout_timeout():
+    redis_cli = _redis_cli(max_connections=1, pool_timeout=0.05, metrics=True)
+    held = redis_cli._redis_pool.get_connection()
+    with pytest.raises(ConnectionError):
+        redis_cli.get("a")
+    redis_cli._redis_pool.release(held)
+    snap = redis_cli.metrics.snapshot()
+    assert snap["checkout"]["count"] == 2
+    assert snap["checkout_errors"] == 1
+    assert "_checkout_errors_total 1" in redis_cli.metrics.to_prometheus()
+
+
+def test_metrics_record_pipelined_commands():
+    redis_cli = _redis_cli(auto_batch=True, metrics=True)
+    redis_cli.set("a", 1)
+    assert redis_cli.get("a") == b"1"
+    with redis_cli.batch() as batch:
+        batch.incr("a")
+        batch.set("x", object())
+    commands = redis_cli.metrics.snapshot()["commands"]
+    assert commands["SET"]["count"] == 2
+    assert commands["GET"]["count"] == 1
+    assert commands["INCR"]["count"] == 1
+    assert redis_cli.metrics.snapshot()["errors"] == {"SET": 1}
@@ -16,6 +16,10 @@ class SystemClockError(Exception):
     """系统时钟异常"""
 
 
+class LeaseError(Exception):
+    """租约异常"""
+
+
 class DriverError(Exception):
     """驱动异常"""
 
@@ -7,15 +7,36 @@
 @history
 """
 
+import asyncio
+import os
+import threading
 import time
+from array import array
+from collections.abc import Generator
+from contextlib import nullcontext
 from datetime import datetime, timedelta
+from typing import Literal
 
-from toollib.common.error import SystemClockError
+from toollib.common.error import LeaseError, SystemClockError
 from toollib.utils import Singleton, now2timestr
 
+try:
+    import fcntl
+
+    def _lock_fd(fd: int):
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+except ImportError:
+    import msvcrt
+
+    def _lock_fd(fd: int):
+        msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+
+
 __all__ = [
     "SnowFlake",
     "RedisUid",
+    "AsyncRedisUid",
 ]
 
 
@@ -38,6 +59,25 @@ class SnowFlake(metaclass=Singleton):
         snow_cli = SnowFlake()
         uid = snow_cli.gen_uid()
 
+        # 批量生成
+        uids = snow_cli.gen_uids(10000)
+        uids = snow_cli.gen_uids(10000, as_array=True)  # array('q')
+        for uid in snow_cli.iter_uids(10000):
+            pass
+
+        # 多进程（自动租用不重复的worker_id+datacenter_id，fork后子进程重新租用）
+        snow_cli = SnowFlake(lease_dir="/tmp/snowflake-lease")
+
+        # 序号耗尽时休眠等待（默认自旋），可通过stall_count/stall_time查看等待次数与耗时
+        snow_cli = SnowFlake(wait_mode="sleep", wait_backoff="exponential")
+
+        # 时钟回拨容忍：10毫秒内的回拨沿用上次时间戳继续生成（超出仍异常）
+        snow_cli = SnowFlake(clock_backwards="borrow", max_backwards=10)
+
+        # 解析（按实例配置的位数与纪元）
+        snow_cli.parse(uid)  # {'timestamp': ..., 'datacenter_id': ..., 'worker_id': ..., 'sequence': ...}
+        snow_cli.parse_many(uids)  # 支持list、array、numpy数组，返回各字段列
+
         +++++[更多详见参数或源码]+++++
     """
 
@@ -51,6 +91,14 @@ class SnowFlake(metaclass=Singleton):
         datacenter_id_bits: int = 5,
         sequence_bits: int = 12,
         to_str: bool = False,
+        thread_safe: bool = True,
+        lease_dir: str | None = None,
+        wait_mode: Literal["spin", "yield", "sleep"] = "spin",
+        wait_backoff: Literal["fixed", "exponential"] = "fixed",
+        wait_interval: float = 0.0001,
+        clock_backwards: Literal["raise", "wait", "borrow"] = "raise",
+        max_backwards: int = 10,
+        monotonic: bool = False,
     ):
         """
         初始化
@@ -65,6 +113,14 @@ class SnowFlake(metaclass=Singleton):
         :param datacenter_id_bits: 服务id位数
         :param sequence_bits: 序号位数
         :param to_str: 是否转为字符串
+        :param thread_safe: 是否线程安全（内部加锁，单线程使用可关闭以减少开销）
+        :param lease_dir: 租约目录，指定则从中自动租用'worker_id'+'datacenter_id'（忽略传入值，用于多进程）
+        :param wait_mode: 序号耗尽时等待下一毫秒的方式：spin-自旋，yield-让出cpu，sleep-休眠
+        :param wait_backoff: 休眠退避策略（wait_mode=sleep时有效）：fixed-固定间隔，exponential-指数递增
+        :param wait_interval: 休眠初始间隔（秒，不超过距下一毫秒的剩余时间）
+        :param clock_backwards: 时钟回拨处理：raise-异常，wait-等待时钟追上，borrow-沿用上次时间戳（序号耗尽则预借下一毫秒）
+        :param max_backwards: 可容忍的最大回拨毫秒数（超出则异常，clock_backwards=raise时无效）
+        :param monotonic: 是否使用启动时锚定的单调时钟（不受系统时钟调整影响，但不随NTP校准）
         """
         if not isinstance(worker_id, (int, type(None))):
             raise TypeError('"worker_id" only supported: int')
@@ -76,9 +132,13 @@ class SnowFlake(metaclass=Singleton):
             raise ValueError(f'"worker_id" only supported: 0 ~ {max_worker_id}')
         if datacenter_id > max_datacenter_id or datacenter_id < 0:
             raise ValueError(f'"datacenter_id" only supported: 0 ~ {max_datacenter_id}')
+        if wait_mode not in ("spin", "yield", "sleep"):
+            raise ValueError('"wait_mode" only supported: spin, yield, sleep')
+        if wait_backoff not in ("fixed", "exponential"):
+            raise ValueError('"wait_backoff" only supported: fixed, exponential')
+        if clock_backwards not in ("raise", "wait", "borrow"):
+            raise ValueError('"clock_backwards" only supported: raise, wait, borrow')
 
-        self.worker_id = worker_id
-        self.datacenter_id = datacenter_id
         self.sequence = sequence
         self.epoch_timestamp = epoch_timestamp
         self.last_timestamp = -1
@@ -87,8 +147,48 @@ class SnowFlake(metaclass=Singleton):
         self.datacenter_id_shift = sequence_bits + worker_id_bits
         self.timestamp_left_shift = sequence_bits + worker_id_bits + datacenter_id_bits
         self.sequence_mask = -1 ^ (-1 << sequence_bits)
+        self.worker_id_mask = max_worker_id
+        self.datacenter_id_mask = max_datacenter_id
+
+        self.wait_mode = wait_mode
+        self.wait_backoff = wait_backoff
+        self.wait_interval = wait_interval
+        self.stall_count = 0
+        self.stall_time = 0.0
+        self.clock_backwards = clock_backwards
+        self.max_backwards = max_backwards
+        self.backwards_count = 0
+        if monotonic:
+            anchor_ns = time.time_ns() - time.monotonic_ns()
+            self._current_timestamp = lambda: (anchor_ns + time.monotonic_ns()) // 1_000_000
 
         self.to_str = to_str
+        self.thread_safe = thread_safe
+        self._lock = threading.Lock() if thread_safe else nullcontext()
+        self._lease = None
+        if lease_dir:
+            self._lease = _SlotLease(lease_dir, slots=(max_datacenter_id + 1) * (max_worker_id + 1))
+            worker_id, datacenter_id = self._lease_node()
+        self._set_node(worker_id, datacenter_id)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _set_node(self, worker_id: int, datacenter_id: int):
+        self.worker_id = worker_id
+        self.datacenter_id = datacenter_id
+        self._node_bits = (datacenter_id << self.datacenter_id_shift) | (worker_id << self.worker_id_shift)
+
+    def _lease_node(self) -> tuple[int, int]:
+        slot = self._lease.acquire()
+        worker_bits = self.datacenter_id_shift - self.worker_id_shift
+        return slot & (-1 ^ (-1 << worker_bits)), slot >> worker_bits
+
+    def _after_fork(self):
+        if self.thread_safe:
+            self._lock = threading.Lock()
+        if self._lease:
+            self._lease.release()
+            self._set_node(*self._lease_node())
 
     def gen_uid(self, to_str: bool | None = None):
         """
@@ -98,37 +198,181 @@ class SnowFlake(metaclass=Singleton):
         """
         if to_str is None:
             to_str = self.to_str
-        timestamp = self._current_timestamp()
-        if timestamp < self.last_timestamp:
-            raise SystemClockError(
-                "Clock moved backwards. Refusing to generate id for %s milliseconds" % (self.last_timestamp - timestamp)
-            )
-        if timestamp == self.last_timestamp:
-            self.sequence = (self.sequence + 1) & self.sequence_mask
-            if self.sequence == 0:
-                timestamp = self._til_next_millis(self.last_timestamp)
-        else:
-            self.sequence = 0
-        self.last_timestamp = timestamp
-        uid = (
-            ((timestamp - self.epoch_timestamp) << self.timestamp_left_shift)
-            | (self.datacenter_id << self.datacenter_id_shift)
-            | (self.worker_id << self.worker_id_shift)
-            | self.sequence
-        )
+        timestamp, sequence, _ = self._next_range(1)
+        uid = ((timestamp - self.epoch_timestamp) << self.timestamp_left_shift) | self._node_bits | sequence
         if to_str is True:
             uid = str(uid)
         return uid
 
+    def gen_uids(self, n: int, to_str: bool | None = None, as_array: bool = False) -> list | array:
+        """
+        批量生成唯一id（按毫秒整段预留序号）
+        :param n: 数量
+        :param to_str: 是否转为字符串(可覆盖cls中的to_str)
+        :param as_array: 是否返回array('q')（不可与to_str同时使用）
+        :return:
+        """
+        if to_str is None:
+            to_str = self.to_str
+        if as_array and to_str:
+            raise ValueError('"as_array" cannot be used with "to_str"')
+        uids = array("q") if as_array else []
+        for first, last in self._iter_ranges(n):
+            if to_str:
+                uids.extend(map(str, range(first, last)))
+            else:
+                uids.extend(range(first, last))
+        return uids
+
+    def iter_uids(self, n: int, to_str: bool | None = None) -> Generator:
+        """
+        批量生成唯一id（生成器形式，按毫秒整段预留序号）
+        :param n: 数量
+        :param to_str: 是否转为字符串(可覆盖cls中的to_str)
+        :return:
+        """
+        if to_str is None:
+            to_str = self.to_str
+        for first, last in self._iter_ranges(n):
+            if to_str:
+                yield from map(str, range(first, last))
+            else:
+                yield from range(first, last)
+
+    def parse(self, uid: int | str) -> dict:
+        """
+        解析唯一id
+        :param uid: 唯一id
+        :return: {'timestamp': 毫秒时间戳, 'datacenter_id': ..., 'worker_id': ..., 'sequence': ...}
+        """
+        uid = int(uid)
+        return {
+            "timestamp": (uid >> self.timestamp_left_shift) + self.epoch_timestamp,
+            "datacenter_id": (uid >> self.datacenter_id_shift) & self.datacenter_id_mask,
+            "worker_id": (uid >> self.worker_id_shift) & self.worker_id_mask,
+            "sequence": uid & self.sequence_mask,
+        }
+
+    def parse_many(self, uids) -> dict:
+        """
+        批量解析唯一id
+        :param uids: 唯一id序列（list、array('q')或numpy数组）
+        :return: {'timestamp': [...], 'datacenter_id': [...], 'worker_id': [...], 'sequence': [...]}（numpy输入返回numpy数组列，array输入返回array('q')列）
+        """
+        if hasattr(uids, "dtype"):
+            uids = uids.astype("int64", copy=False)
+            return {
+                "timestamp": (uids >> self.timestamp_left_shift) + self.epoch_timestamp,
+                "datacenter_id": (uids >> self.datacenter_id_shift) & self.datacenter_id_mask,
+                "worker_id": (uids >> self.worker_id_shift) & self.worker_id_mask,
+                "sequence": uids & self.sequence_mask,
+            }
+        if not isinstance(uids, array):
+            uids = [int(uid) for uid in uids]
+        ts_shift, dc_shift, wk_shift = self.timestamp_left_shift, self.datacenter_id_shift, self.worker_id_shift
+        dc_mask, wk_mask, seq_mask = self.datacenter_id_mask, self.worker_id_mask, self.sequence_mask
+        epoch = self.epoch_timestamp
+        columns = {
+            "timestamp": [(uid >> ts_shift) + epoch for uid in uids],
+            "datacenter_id": [(uid >> dc_shift) & dc_mask for uid in uids],
+            "worker_id": [(uid >> wk_shift) & wk_mask for uid in uids],
+            "sequence": [uid & seq_mask for uid in uids],
+        }
+        if isinstance(uids, array):
+            return {k: array("q", v) for k, v in columns.items()}
+        return columns
+
+    def _iter_ranges(self, n: int) -> Generator:
+        if not isinstance(n, int):
+            raise TypeError('"n" only supported: int')
+        if n < 0:
+            raise ValueError('"n" greater than or equal to 0')
+        while n > 0:
+            timestamp, sequence, count = self._next_range(n)
+            uid = ((timestamp - self.epoch_timestamp) << self.timestamp_left_shift) | self._node_bits | sequence
+            yield uid, uid + count
+            n -= count
+
+    def _next_range(self, n: int) -> tuple[int, int, int]:
+        """预留当前毫秒内至多n个连续序号，返回(时间戳, 起始序号, 数量)"""
+        with self._lock:
+            timestamp = self._current_timestamp()
+            if timestamp < self.last_timestamp:
+                timestamp = self._clock_moved_backwards(timestamp)
+            if timestamp == self.last_timestamp:
+                sequence = (self.sequence + 1) & self.sequence_mask
+                if sequence == 0:
+                    timestamp = self._til_next_millis(self.last_timestamp)
+            else:
+                sequence = 0
+            count = min(n, self.sequence_mask + 1 - sequence)
+            self.sequence = sequence + count - 1
+            self.last_timestamp = timestamp
+            return timestamp, sequence, count
+
+    def _clock_moved_backwards(self, timestamp):
+        offset = self.last_timestamp - timestamp
+        if self.clock_backwards == "raise" or offset > self.max_backwards:
+            raise SystemClockError(f"Clock moved backwards. Refusing to generate id for {offset} milliseconds")
+        self.backwards_count += 1
+        if self.clock_backwards == "wait":
+            return self._til_next_millis(self.last_timestamp - 1)
+        return self.last_timestamp
+
     def _til_next_millis(self, last_timestamp):
         timestamp = self._current_timestamp()
+        if self.clock_backwards == "borrow" and 0 < last_timestamp - timestamp < self.max_backwards:
+            return last_timestamp + 1
+        start = time.perf_counter()
+        interval = self.wait_interval
         while timestamp <= last_timestamp:
+            if self.wait_mode == "sleep":
+                remaining = (last_timestamp + 1) / 1000 - time.time()
+                time.sleep(max(min(interval, remaining), 0))
+                if self.wait_backoff == "exponential":
+                    interval *= 2
+            elif self.wait_mode == "yield":
+                time.sleep(0)
             timestamp = self._current_timestamp()
+        self.stall_count += 1
+        self.stall_time += time.perf_counter() - start
         return timestamp
 
     @staticmethod
     def _current_timestamp():
-        return int(time.time() * 1000)
+        return time.time_ns() // 1_000_000
+
+
+class _SlotLease:
+    """
+    槽位租约，基于文件锁（持有者进程退出后由系统自动释放）
+    """
+
+    def __init__(self, lease_dir: str, slots: int, name: str = "snowflake"):
+        self.lease_dir = lease_dir
+        self.slots = slots
+        self.name = name
+        self.slot = None
+        self._fd = None
+
+    def acquire(self) -> int:
+        os.makedirs(self.lease_dir, exist_ok=True)
+        for slot in range(self.slots):
+            fd = os.open(os.path.join(self.lease_dir, f"{self.name}-{slot}.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                _lock_fd(fd)
+            except OSError:
+                os.close(fd)
+                continue
+            self._fd, self.slot = fd, slot
+            return slot
+        raise LeaseError(f"No free slot in {self.lease_dir} (slots: {self.slots})")
+
+    def release(self):
+        """释放（fork后的子进程中调用只会关闭继承的描述符，不影响父进程的租约）"""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd, self.slot = None, None
 
 
 class RedisUid:
@@ -142,6 +386,9 @@ class RedisUid:
         ruid_cli = RedisUid(redis_cli, prefix='ABC')
         uid = ruid_cli.gen_uid()
 
+        # 号段预取：每次incrby取1000个序号在进程内分配，余量不足20%时后台预取下一号段
+        ruid_cli = RedisUid(redis_cli, prefix='ABC', prefetch=1000, refill_ratio=0.2)
+
         +++++[更多详见参数或源码]+++++
     """
 
@@ -155,6 +402,8 @@ class RedisUid:
         seq_ex: datetime | None = None,
         date_fmt: str | None = "%Y%m%d",
         sep: str = "",
+        prefetch: int = 0,
+        refill_ratio: float = 0.2,
     ):
         """
         初始化
@@ -166,6 +415,8 @@ class RedisUid:
         :param seq_ex: 序列过期时间，为空则默认第二天凌晨
         :param date_fmt: 日期格式，为空则没有日期拼接
         :param sep: 分隔符，默认为空
+        :param prefetch: 号段预取大小，默认为0（不预取，每个id都访问redis）
+        :param refill_ratio: 号段余量低于该比例时后台预取下一号段
         """
         self.redis_cli = redis_cli
         self.prefix = prefix
@@ -175,7 +426,15 @@ class RedisUid:
         self.seq_ex = seq_ex
         self.date_fmt = date_fmt
         self.sep = sep
+        self.prefetch = prefetch
+        self.refill_ratio = refill_ratio
         self._check_params()
+        self._script = None
+        self._lock = threading.Lock()
+        self._segment = None  # [当前值, 最大值, 过期时间戳]
+        self._next_segment = None
+        self._refilling = False
+        self._refill_error = None  # 后台预取失败后不再后台重试，直到同步获取成功
 
     def _check_params(self):
         if not isinstance(self.prefix, (str, NoneType)):
@@ -190,6 +449,8 @@ class RedisUid:
             raise TypeError("'seq_ex'只支持datetime型")
         if not isinstance(self.sep, str):
             raise TypeError("'sep'只支持字符串型")
+        if not isinstance(self.prefetch, int) or self.prefetch < 0:
+            raise TypeError("'prefetch'只支持非负整型")
 
     def gen_uid(self, seq_step: int = 1):
         """
@@ -199,15 +460,71 @@ class RedisUid:
         """
         if not isinstance(seq_step, int):
             raise TypeError("'seq_step'只支持整型")
-        if self.redis_cli.ttl(self.seq_name) < 0:
-            self.redis_cli.set(self.seq_name, self.seq_beg)
-            self.redis_cli.expireat(self.seq_name, self._set_ex(self.seq_ex))
+        if 0 < seq_step <= self.prefetch:
+            _seq_value = self._take(seq_step)
+        else:
+            _seq_value, _ = self._incrby(seq_step)
+        return self._format_uid(_seq_value)
+
+    def _format_uid(self, seq_value: int) -> str:
         _prefix = self.prefix or ""
         _date_value = now2timestr(self.date_fmt) if self.date_fmt else ""
-        _seq_value = self.redis_cli.incrby(self.seq_name, seq_step)
-        uid = self.sep.join([_prefix, _date_value, str(_seq_value).zfill(self.seq_len)]).lstrip(self.sep)
+        uid = self.sep.join([_prefix, _date_value, str(seq_value).zfill(self.seq_len)]).lstrip(self.sep)
         return uid
 
+    # 原子执行：初始化(序列不存在或无过期时间) + 自增，返回 {自增值, 剩余毫秒}
+    _lua_incrby = """
+        if redis.call('ttl', KEYS[1]) < 0 then
+            redis.call('set', KEYS[1], ARGV[1])
+            redis.call('expireat', KEYS[1], ARGV[2])
+        end
+        return {redis.call('incrby', KEYS[1], ARGV[3]), redis.call('pttl', KEYS[1])}
+    """
+
+    def _incrby(self, seq_step: int) -> tuple[int, int]:
+        if self._script is None:
+            self._script = self.redis_cli.register_script(self._lua_incrby)
+        ex = int(self._set_ex(self.seq_ex).timestamp())
+        value, pttl = self._script(keys=[self.seq_name], args=[self.seq_beg, ex, seq_step])
+        return value, pttl
+
+    def _fetch_segment(self) -> list:
+        hi, pttl = self._incrby(self.prefetch)
+        expire_at = time.time() + pttl / 1000 if pttl > 0 else float("inf")
+        return [hi - self.prefetch, hi, expire_at]
+
+    def _take(self, seq_step: int) -> int:
+        with self._lock:
+            segment = self._segment
+            if segment is None or segment[0] + seq_step > segment[1] or time.time() >= segment[2]:
+                segment = self._next_segment
+                self._next_segment = None
+                if segment is None or time.time() >= segment[2]:
+                    segment = self._fetch_segment()
+                    self._refill_error = None
+                self._segment = segment
+            segment[0] += seq_step
+            if (
+                not self._refilling
+                and self._refill_error is None
+                and self._next_segment is None
+                and segment[1] - segment[0] <= self.prefetch * self.refill_ratio
+            ):
+                self._refilling = True
+                threading.Thread(target=self._refill, daemon=True).start()
+            return segment[0]
+
+    def _refill(self):
+        try:
+            segment = self._fetch_segment()
+            with self._lock:
+                self._next_segment = segment
+        except Exception as e:
+            # 号段用尽时由同步路径获取（异常抛给调用方）
+            self._refill_error = e
+        finally:
+            self._refilling = False
+
     @staticmethod
     def _set_ex(ex):
         if not ex:
@@ -218,3 +535,80 @@ class RedisUid:
                 microsecond=0,
             )
         return ex
+
+
+class AsyncRedisUid(RedisUid):
+    """
+    全局唯一id，基于redis实现（异步版，redis_cli为redis.asyncio客户端）
+
+    e.g.::
+
+        from redis.asyncio import Redis
+        from toollib.guid import AsyncRedisUid
+
+        ruid_cli = AsyncRedisUid(Redis(), prefix='ABC')
+        uid = await ruid_cli.gen_uid()
+
+        +++++[更多详见参数或源码]+++++
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = asyncio.Lock()
+        self._refill_task = None
+
+    async def gen_uid(self, seq_step: int = 1):
+        """
+        生成唯一id
+        :param seq_step: 序列步长，默认为1
+        :return:
+        """
+        if not isinstance(seq_step, int):
+            raise TypeError("'seq_step'只支持整型")
+        if 0 < seq_step <= self.prefetch:
+            _seq_value = await self._take(seq_step)
+        else:
+            _seq_value, _ = await self._incrby(seq_step)
+        return self._format_uid(_seq_value)
+
+    async def _incrby(self, seq_step: int) -> tuple[int, int]:
+        if self._script is None:
+            self._script = self.redis_cli.register_script(self._lua_incrby)
+        ex = int(self._set_ex(self.seq_ex).timestamp())
+        value, pttl = await self._script(keys=[self.seq_name], args=[self.seq_beg, ex, seq_step])
+        return value, pttl
+
+    async def _fetch_segment(self) -> list:
+        hi, pttl = await self._incrby(self.prefetch)
+        expire_at = time.time() + pttl / 1000 if pttl > 0 else float("inf")
+        return [hi - self.prefetch, hi, expire_at]
+
+    async def _take(self, seq_step: int) -> int:
+        async with self._lock:
+            segment = self._segment
+            if segment is None or segment[0] + seq_step > segment[1] or time.time() >= segment[2]:
+                segment = self._next_segment
+                self._next_segment = None
+                if segment is None or time.time() >= segment[2]:
+                    segment = await self._fetch_segment()
+                    self._refill_error = None
+                self._segment = segment
+            segment[0] += seq_step
+            if (
+                not self._refilling
+                and self._refill_error is None
+                and self._next_segment is None
+                and segment[1] - segment[0] <= self.prefetch * self.refill_ratio
+            ):
+                self._refilling = True
+                self._refill_task = asyncio.create_task(self._refill())
+            return segment[0]
+
+    async def _refill(self):
+        try:
+            self._next_segment = await self._fetch_segment()
+        except Exception as e:
+            # 号段用尽时由同步路径获取（异常抛给调用方）
+            self._refill_error = e
+        finally:
+            self._refilling = False
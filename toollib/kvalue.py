@@ -8,11 +8,19 @@
 """
 
 import os
+import pickle
+import queue
 import sqlite3
 import tempfile
+import threading
 import time
-from collections.abc import Generator, Sequence
-from typing import Any
+import weakref
+import zlib
+from collections import OrderedDict
+from collections.abc import Callable, Generator, Iterable, Mapping, Sequence
+from concurrent.futures import Future
+from contextlib import contextmanager, suppress
+from typing import Any, Literal
 
 from toollib.common.error import ExpireError
 
@@ -37,12 +45,19 @@ class KValue:
         - float
         - bool
         - NoneType
+        - 其他编解码器：msgpack-msgpack支持的类型，pickle-任意可序列化对象（仅限可信数据），bytes-字节
 
     e.g.::
 
         # 创建一个 kvalue 实例
         kv = KValue()
 
+        # 推荐：性能模式（WAL + synchronous=NORMAL 等，读写互不阻塞）
+        kv = KValue(file='data.kv', profile='performance')
+
+        # 多线程/多进程：线程独立连接 + 忙重试，写入由单写线程按批合并提交
+        kv = KValue(file='data.kv', profile='performance', thread_local=True, busy_retries=5, group_commit=True)
+
         # 增删改查等操作
         kv.set(key='name', value='xxx')
         kv.get(key='name')
@@ -50,37 +65,328 @@ class KValue:
         kv.delete(key='name')
         ...
 
+        # 读缓存：进程内LRU（按 expire 及 cache_ttl 失效），跨进程写入可通过 data_version 检测
+        kv = KValue(file='data.kv', cache_size=10000, cache_ttl=60, cache_sync=True)
+        kv.cache_stats()
+
+        # 后台清理过期键（每 60 秒按批删除；过期键读取时视为不存在）
+        kv = KValue(file='data.kv', sweep_interval=60, sweep_batch=500)
+
+        # 批量操作（单个事务）
+        kv.set_many({'a': 1, 'b': 2}, expire=60)
+        kv.get_many(['a', 'b'])
+        kv.exists_many(['a', 'b'])
+        kv.delete_many(['a', 'b'])
+
+        # 编解码与压缩（值以BLOB存储并记录编码标记，读取时按标记解码）
+        kv = KValue(file='data.kv', codec='msgpack', compress='zstd', compress_threshold=1024)
+        KValue.register_codec('yaml', dumps=..., loads=...)  # 自定义编解码器
+        # pickle标记的值仅在codec为pickle或allow_pickle=True时解码（其他编解码器读取时拒绝）
+
+        # 旧文件（text列、JSON文本）可直接读写，迁移为BLOB列并按当前编解码器重新编码
+        kv = KValue(file='old.kv', codec='msgpack')
+        kv.migrate()
+
         +++++[更多详见参数或源码]+++++
     """
 
-    __slots__ = ("file", "tbname", "columns", "conn")
+    __slots__ = (
+        "file",
+        "tbname",
+        "columns",
+        "pragmas",
+        "busy_retries",
+        "busy_backoff",
+        "_conn",
+        "_local",
+        "_conns",
+        "_writer",
+        "_cache",
+        "_cache_sync",
+        "_sweeper",
+        "codec",
+        "compress",
+        "compress_threshold",
+        "allow_pickle",
+    )
     _support_types = (str, list, dict, int, float, bool, type(None))
+    _max_variables = 900  # 单条语句的参数个数上限（兼容sqlite旧版本的999）
+    _profiles = {
+        "default": {},
+        "performance": {
+            "journal_mode": "wal",
+            "synchronous": "normal",
+            "mmap_size": 268435456,
+            "cache_size": -65536,
+            "temp_store": "memory",
+            "busy_timeout": 5000,
+        },
+    }
 
-    def __init__(self, file: str | None = None, tbname: str = "kvalue"):
+    def __init__(
+        self,
+        file: str | None = None,
+        tbname: str = "kvalue",
+        profile: Literal["default", "performance"] = "default",
+        pragmas: dict[str, Any] | None = None,
+        thread_local: bool = False,
+        busy_retries: int = 0,
+        busy_backoff: float = 0.01,
+        group_commit: bool = False,
+        commit_interval: float = 0.0,
+        cache_size: int = 0,
+        cache_ttl: float = 0.0,
+        cache_sync: bool = False,
+        sweep_interval: float = 0.0,
+        sweep_batch: int = 500,
+        codec: str = "json",
+        compress: Literal["zlib", "zstd"] | None = None,
+        compress_threshold: int = 1024,
+        allow_pickle: bool = False,
+    ):
+        """
+        初始化
+        :param file: 数据文件，为空则创建临时文件
+        :param tbname: 表名
+        :param profile: 连接配置：default-sqlite默认（回滚日志+完全同步），performance-推荐（WAL、synchronous=NORMAL、mmap等）
+        :param pragmas: 自定义pragma（覆盖profile中的同名项）
+        :param thread_local: 是否每个线程使用独立连接（多线程共享实例时开启）
+        :param busy_retries: 写入遇到"database is locked"时的重试次数（多进程共享文件时建议开启）
+        :param busy_backoff: 重试的初始退避间隔（秒，指数递增）
+        :param group_commit: 是否单写线程模式（各线程的写入排队，每批合并为一个事务提交）
+        :param commit_interval: 单写线程每批的额外合并等待（秒，默认不等待：提交期间到达的写入自然合并为下一批）
+        :param cache_size: 读缓存容量（LRU，0表示不开启；命中时返回缓存的同一对象，请勿原地修改）
+        :param cache_ttl: 读缓存时长（秒，0表示仅按 expire 失效）
+        :param cache_sync: 是否每次读前检测 data_version（其他连接/进程写入后清空读缓存）
+        :param sweep_interval: 后台清理过期键的间隔（秒，0表示不开启）
+        :param sweep_batch: 后台清理每批删除的数量（小批量，避免长时间占用写锁）
+        :param codec: 编解码器：json-默认，msgpack-需安装msgpack，pickle-仅限可信数据，bytes-原始字节（或register_codec注册的）
+        :param compress: 压缩：zlib，zstd-需安装zstandard（python3.14+内置）
+        :param compress_threshold: 压缩阈值（编码后字节数达到该值才压缩）
+        :param allow_pickle: 是否允许读取pickle编码的值（codec为pickle时总是允许；否则拒绝，避免不可信文件执行任意代码）
+        """
+        if profile not in self._profiles:
+            raise ValueError(f'"profile" only supported: {", ".join(self._profiles)}')
+        _codec(codec)
+        if compress:
+            _codec(compress, _compressors)
         if not file:
             with tempfile.NamedTemporaryFile(mode="wb", suffix=".kv", delete=False) as t:
                 file = t.name
         self.file = os.path.abspath(file)
         self.tbname = tbname
-        self.columns = (("key", "text"), ("value", "text"), ("expire", "real"))
-        self.conn = None
+        self.columns = (("key", "text"), ("value", "blob"), ("expire", "real"), ("codec", "text"))
+        self.codec = codec
+        self.compress = compress
+        self.compress_threshold = compress_threshold
+        self.allow_pickle = allow_pickle or codec == "pickle"
+        self.pragmas = {**self._profiles[profile], **(pragmas or {})}
+        self.busy_retries = busy_retries
+        self.busy_backoff = busy_backoff
+        self._conn = None
+        self._local = threading.local() if thread_local else None
+        self._conns = []
+        self._writer = None
+        self._cache = _ReadCache(cache_size, cache_ttl) if cache_size > 0 else None
+        self._cache_sync = cache_sync
+        self._sweeper = None
         self._new_db()
+        if group_commit:
+            self._writer = _GroupWriter(self, interval=commit_interval)
+        if sweep_interval > 0:
+            self._sweeper = _Sweeper(self, interval=sweep_interval, batch_size=sweep_batch)
+
+    @property
+    def conn(self) -> sqlite3.Connection | None:
+        if self._local is None:
+            return self._conn
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self.conn = self._connect(check_same_thread=False)
+        return conn
+
+    @conn.setter
+    def conn(self, conn: sqlite3.Connection | None):
+        if self._local is None:
+            self._conn = conn
+            return
+        self._local.conn = conn
+        if conn is not None:
+            # 线程结束（thread-local被回收）时关闭该线程的连接
+            self._local.owner = owner = _ThreadOwner()
+            weakref.finalize(owner, _close_conn, self._conns, conn)
 
     def __enter__(self):
-        self.conn = sqlite3.connect(self.file)
+        if self.conn:
+            self.conn.close()
+            self._conns.remove(self.conn)
+        self.conn = self._connect(check_same_thread=self._local is None)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if self.conn:
-            self.conn.close()
+        self.close()
+
+    def close(self):
+        """
+        关闭（停止单写线程，关闭所有连接）
+        :return:
+        """
+        if self._sweeper is not None:
+            self._sweeper.stop()
+            self._sweeper = None
+        if self._writer is not None:
+            self._writer.stop()
+            self._writer = None
+        conns = self._conns[:]
+        self._conns.clear()
+        for conn in conns:
+            conn.close()
+
+    def _connect(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        # 线程连接/写线程连接由close()统一关闭，需允许跨线程close
+        conn = sqlite3.connect(self.file, check_same_thread=check_same_thread)
+        for name, value in self.pragmas.items():
+            conn.execute(f"pragma {name} = {value}")
+        self._conns.append(conn)
+        return conn
 
     def _new_db(self):
         if not self.conn:
-            self.conn = sqlite3.connect(self.file)
-        with self.conn as conn:
-            sql = f"create table if not exists {self.tbname} (key text not null primary key, value text, expire real)"
-            cursor = conn.cursor()
-            cursor.execute(sql)
+            self.conn = self._connect(check_same_thread=self._local is None)
+        statements = [
+            (self._create_table_sql(self.tbname), (), False),
+            (f"create index if not exists {self.tbname}_expire on {self.tbname} (expire) where expire > 0", (), False),
+        ]
+        self._write(statements)
+        # 旧文件：补充编码标记列（标记为空的值按JSON文本解码）
+        if "codec" not in self._table_columns():
+            self._write([(f"alter table {self.tbname} add column codec text", (), False)])
+
+    @staticmethod
+    def _create_table_sql(tbname: str) -> str:
+        return (
+            f"create table if not exists {tbname} (key text not null primary key, value blob, expire real, codec text)"
+        )
+
+    def _table_columns(self) -> dict:
+        cursor = self.conn.execute(f"pragma table_info({self.tbname})")
+        return {row[1]: row[2].lower() for row in cursor}
+
+    @staticmethod
+    def register_codec(name: str, dumps: Callable[[Any], bytes], loads: Callable[[bytes], Any]):
+        """
+        注册编解码器
+        :param name: 名称（不能包含"+"）
+        :param dumps: 编码（值 -> bytes）
+        :param loads: 解码（bytes -> 值）
+        :return:
+        """
+        if not name or "+" in name:
+            raise ValueError('"name" cannot be empty or contain "+"')
+        _codecs[name] = lambda: (dumps, loads)
+
+    def _encode(self, value) -> tuple:
+        if value is None:
+            return None, None
+        dumps, _ = _codec(self.codec)
+        data = dumps(value)
+        if self.compress and len(data) >= self.compress_threshold:
+            compressed = _codec(self.compress, _compressors)[0](data)
+            if len(compressed) < len(data):
+                return compressed, f"{self.codec}+{self.compress}"
+        return data, self.codec
+
+    def _decode(self, value, codec: str | None):
+        if codec is None:
+            return json.loads(value) if value else value
+        name, _, compress = codec.partition("+")
+        if name == "pickle" and not self.allow_pickle:
+            raise ValueError('"pickle" value not allowed (codec is not pickle, set "allow_pickle" if trusted)')
+        if compress:
+            value = _codec(compress, _compressors)[1](value)
+        return _codec(name)[1](value)
+
+    def migrate(self, batch_size: int = 1000) -> int:
+        """
+        迁移旧文件：value列改为BLOB，无编码标记（JSON文本）的值按当前编解码器重新编码
+        :param batch_size: 每批重新编码的数量
+        :return: 重新编码的数量
+        """
+        if self._table_columns().get("value") != "blob":
+            tmp = f"{self.tbname}_migrate"
+            self._write(
+                [
+                    (f"drop table if exists {tmp}", (), False),
+                    (self._create_table_sql(tmp), (), False),
+                    (
+                        f"insert into {tmp} (key, value, expire, codec) select key, value, expire, codec from {self.tbname}",
+                        (),
+                        False,
+                    ),
+                    (f"drop table {self.tbname}", (), False),
+                    (f"alter table {tmp} rename to {self.tbname}", (), False),
+                    (
+                        f"create index if not exists {self.tbname}_expire on {self.tbname} (expire) where expire > 0",
+                        (),
+                        False,
+                    ),
+                ]
+            )
+        rowcount = 0
+        sql = f"select key, value from {self.tbname} where codec is null and value is not null limit ?"
+        while True:
+            rows = self.conn.execute(sql, (batch_size,)).fetchall()
+            if not rows:
+                return rowcount
+            params = [(*self._encode(self._decode(value, None)), key) for key, value in rows]
+            rowcount += self._write(
+                [(f"update {self.tbname} set value = ?, codec = ? where key = ?", params, True)], keys=None
+            )
+
+    @property
+    def _alive(self) -> str:
+        """未过期条件（需绑定参数：当前时间）"""
+        return "(expire is null or expire <= 0 or expire > ?)"
+
+    def _write(self, statements: list[tuple[str, Any, bool]], keys: Iterable[str] | None = None) -> int:
+        """写入：[(语句, 参数, 是否executemany)]在同一事务中执行，返回影响行数；keys为涉及的键（None表示全部）"""
+        try:
+            if self._writer is not None:
+                return self._writer.submit(statements)
+            return self._retry_busy(self._execute_statements, self.conn, statements)
+        finally:
+            if self._cache is not None:
+                self._cache.invalidate(keys)
+
+    def _cache_check(self):
+        if self._cache_sync:
+            data_version = self.conn.execute("pragma data_version").fetchone()[0]
+            self._cache.sync(id(self.conn), data_version)
+
+    def cache_stats(self) -> dict:
+        """
+        读缓存统计（hits, misses, hit_ratio, invalidations, size）
+        :return:
+        """
+        if self._cache is None:
+            return {}
+        return self._cache.stats()
+
+    @staticmethod
+    def _execute_statements(conn: sqlite3.Connection, statements: list[tuple[str, Any, bool]]) -> int:
+        with conn:
+            return _run_statements(conn.cursor(), statements)
+
+    def _retry_busy(self, func, *args):
+        backoff = self.busy_backoff
+        for attempt in range(self.busy_retries + 1):
+            try:
+                return func(*args)
+            except sqlite3.OperationalError as e:
+                if attempt >= self.busy_retries or not _is_busy(e):
+                    raise
+                time.sleep(backoff)
+                backoff *= 2
 
     def _validate_parameters(self, key, value=None, expire=None):
         if isinstance(key, str):
@@ -89,9 +395,11 @@ class KValue:
         else:
             raise TypeError('"key" only supported: str')
         if value is not None:
-            if not isinstance(value, self._support_types):
+            if self.codec == "json" and not isinstance(value, self._support_types):
                 raise TypeError(f'"value" only supported: {[t.__name__ for t in self._support_types]}')
-            value = json.dumps(value)
+            if self.codec == "bytes" and not isinstance(value, (bytes, bytearray, memoryview)):
+                raise TypeError('"value" only supported: bytes')
+        value, codec = self._encode(value)
         if expire is not None:
             if isinstance(expire, (int, float)):
                 if expire < 0:
@@ -100,9 +408,9 @@ class KValue:
                     expire = round(time.time() + expire, 7)
             else:
                 raise TypeError('"expire" only supported: int or float')
-        return key, value, expire
+        return key, value, expire, codec
 
-    def set(self, key: str, value: str | list | dict | int | float | bool | None, expire: int | float = 0.0):
+    def set(self, key: str, value: Any, expire: int | float = 0.0):
         """
         设置 kye - value
         :param key: 键
@@ -110,34 +418,137 @@ class KValue:
         :param expire: 默认为 0.0（表不设置过期时间）
         :return:
         """
-        with self.conn as conn:
-            key, value, expire = self._validate_parameters(key=key, value=value, expire=expire)
-            sql = f"replace into {self.tbname} (key, value, expire) values (?,?,?)"
-            cursor = conn.cursor()
-            cursor.execute(sql, (key, value, expire))
-            return cursor.rowcount
+        row = self._validate_parameters(key=key, value=value, expire=expire)
+        sql = f"replace into {self.tbname} (key, value, expire, codec) values (?,?,?,?)"
+        return self._write([(sql, row, False)], keys=(key,))
 
     def get(self, key: str, raise_expire: bool = False, return_expire: bool = False):
         """
         获取 key 的 value
         :param key: 键
-        :param raise_expire: 是否过期异常
+        :param raise_expire: 是否过期异常（否则过期视为不存在）
         :param return_expire: 是否返回过期时间
         :return:
         """
+        if self._cache is None:
+            value, expire = self._load(key)
+        else:
+            self._cache_check()
+            item, token = self._cache.lookup(key)
+            if item is None:
+                item = self._load(key)
+                self._cache.store(key, item, token)
+            value, expire = item
+        if expire and expire <= time.time():
+            if raise_expire:
+                raise ExpireError(f'"{key}" already expired')
+            value, expire = None, None
+        if return_expire:
+            return value, expire
+        return value
+
+    def _load(self, key: str) -> tuple:
         with self.conn as conn:
-            sql = f"select value, expire from {self.tbname} where key = ? limit 1"
+            sql = f"select value, expire, codec from {self.tbname} where key = ? limit 1"
             cursor = conn.cursor()
             cursor.execute(sql, (key,))
             one = cursor.fetchone()
-            value, expire = one if one else (None, None)
-            if raise_expire and expire and expire <= time.time():
-                raise ExpireError(f'"{key}" already expired')
-            if value:
-                value = json.loads(value)
-            if return_expire:
-                return value, expire
-            return value
+        if not one:
+            return None, None
+        value, expire, codec = one
+        return self._decode(value, codec), expire
+
+    def set_many(self, mapping: Mapping[str, Any], expire: int | float = 0.0):
+        """
+        批量设置 key - value（单个事务）
+        :param mapping: {键: 值}
+        :param expire: 默认为 0.0（表不设置过期时间）
+        :return:
+        """
+        rows = [self._validate_parameters(key=key, value=value, expire=expire) for key, value in mapping.items()]
+        sql = f"replace into {self.tbname} (key, value, expire, codec) values (?,?,?,?)"
+        return self._write([(sql, rows, True)], keys=mapping)
+
+    def get_many(self, keys: Iterable[str], return_expire: bool = False) -> dict:
+        """
+        批量获取 key 的 value（不存在或已过期的 key 值为 None）
+        :param keys: 键
+        :param return_expire: 是否返回过期时间（值为 (value, expire)）
+        :return: {键: 值}
+        """
+        keys = list(dict.fromkeys(keys))
+        found, tokens = {}, {}
+        if self._cache is not None:
+            self._cache_check()
+            for key in keys:
+                item, token = self._cache.lookup(key)
+                if item is None:
+                    tokens[key] = token
+                else:
+                    found[key] = item
+        missing = list(tokens) if self._cache is not None else keys
+        with self._read_snapshot() as cursor:
+            for chunk in self._chunks(missing):
+                sql = f"select key, value, expire, codec from {self.tbname} where key in ({','.join('?' * len(chunk))})"
+                cursor.execute(sql, chunk)
+                for key, value, expire, codec in cursor:
+                    found[key] = (self._decode(value, codec), expire)
+        for key, token in tokens.items():
+            self._cache.store(key, found.get(key, (None, None)), token)
+        now = time.time()
+        result = {}
+        for key in keys:
+            value, expire = found.get(key, (None, None))
+            if expire and expire <= now:
+                value, expire = None, None
+            result[key] = (value, expire) if return_expire else value
+        return result
+
+    def exists_many(self, keys: Iterable[str]) -> dict:
+        """
+        批量检测 key 是否存在
+        :param keys: 键
+        :return: {键: 是否存在}
+        """
+        keys = list(dict.fromkeys(keys))
+        found = set()
+        now = time.time()
+        with self._read_snapshot() as cursor:
+            for chunk in self._chunks(keys):
+                sql = f"select key from {self.tbname} where key in ({','.join('?' * len(chunk))}) and {self._alive}"
+                cursor.execute(sql, (*chunk, now))
+                found.update(row[0] for row in cursor)
+        return {key: key in found for key in keys}
+
+    def delete_many(self, keys: Iterable[str]):
+        """
+        批量删除 key（单个事务）
+        :param keys: 键
+        :return:
+        """
+        keys = list(dict.fromkeys(keys))
+        statements = [
+            (f"delete from {self.tbname} where key in ({','.join('?' * len(chunk))})", chunk, False)
+            for chunk in self._chunks(keys)
+        ]
+        return self._write(statements, keys=keys)
+
+    @contextmanager
+    def _read_snapshot(self) -> Generator[sqlite3.Cursor, None, None]:
+        """分块查询在同一读事务内执行（同一快照，避免分块间被其他连接写入）"""
+        conn = self.conn
+        began = not conn.in_transaction
+        if began:
+            conn.execute("begin")
+        try:
+            yield conn.cursor()
+        finally:
+            if began:
+                conn.commit()
+
+    def _chunks(self, keys: list) -> Generator:
+        for i in range(0, len(keys), self._max_variables):
+            yield keys[i : i + self._max_variables]
 
     def keys(self, reverse: bool = False) -> Generator:
         """
@@ -146,23 +557,24 @@ class KValue:
         """
         order = "desc" if reverse else "asc"
         with self.conn as conn:
-            sql = f"select key from {self.tbname} order by key {order}"
+            sql = f"select key from {self.tbname} where {self._alive} order by key {order}"
             cursor = conn.cursor()
-            cursor.execute(sql)
+            cursor.execute(sql, (time.time(),))
             for row in cursor:
                 yield row[0]
 
     def items(self, reverse: bool = False) -> Generator:
         """
-        获取所有 item
+        获取所有 item（(key, value, expire)，value已解码）
         :return:
         """
         order = "desc" if reverse else "asc"
         with self.conn as conn:
-            sql = f"select key, value, expire from {self.tbname} order by key {order}"
+            sql = f"select key, value, expire, codec from {self.tbname} where {self._alive} order by key {order}"
             cursor = conn.cursor()
-            cursor.execute(sql)
-            yield from cursor
+            cursor.execute(sql, (time.time(),))
+            for key, value, expire, codec in cursor:
+                yield key, self._decode(value, codec), expire
 
     def count(self) -> int:
         """
@@ -170,9 +582,9 @@ class KValue:
         :return:
         """
         with self.conn as conn:
-            sql = f"select count(key) from {self.tbname}"
+            sql = f"select count(key) from {self.tbname} where {self._alive}"
             cursor = conn.cursor()
-            cursor.execute(sql)
+            cursor.execute(sql, (time.time(),))
             return cursor.fetchone()[0]
 
     def expire(self, key: str, expire: int | float = 0.0):
@@ -182,12 +594,9 @@ class KValue:
         :param expire: 默认为 0.0（表不设置过期时间）
         :return:
         """
-        with self.conn as conn:
-            key, _, expire = self._validate_parameters(key=key, expire=expire)
-            sql = f"update {self.tbname} set expire = ? where key = ?"
-            cursor = conn.cursor()
-            cursor.execute(sql, (expire, key))
-            return cursor.rowcount
+        key, _, expire, _ = self._validate_parameters(key=key, expire=expire)
+        sql = f"update {self.tbname} set expire = ? where key = ?"
+        return self._write([(sql, (expire, key), False)], keys=(key,))
 
     def exists(self, key: str) -> bool:
         """
@@ -196,9 +605,9 @@ class KValue:
         :return:
         """
         with self.conn as conn:
-            sql = f"select exists (select 1 from {self.tbname} where key = ?)"
+            sql = f"select exists (select 1 from {self.tbname} where key = ? and {self._alive})"
             cursor = conn.cursor()
-            cursor.execute(sql, (key,))
+            cursor.execute(sql, (key, time.time()))
             result = cursor.fetchone()[0]
             return bool(result)
 
@@ -208,33 +617,39 @@ class KValue:
         :param key:
         :return:
         """
-        with self.conn as conn:
-            sql = f"delete from {self.tbname} where key = ?"
-            cursor = conn.cursor()
-            cursor.execute(sql, (key,))
-            return cursor.rowcount
+        sql = f"delete from {self.tbname} where key = ?"
+        return self._write([(sql, (key,), False)], keys=(key,))
 
     def clear(self):
         """
         清除所有 key - value
         :return:
         """
-        with self.conn as conn:
-            sql = f"delete from {self.tbname}"
-            cursor = conn.cursor()
-            cursor.execute(sql)
-            return cursor.rowcount
+        sql = f"delete from {self.tbname}"
+        return self._write([(sql, (), False)])
 
-    def clear_expired(self):
+    def clear_expired(self, batch_size: int = 0):
         """
         清除已过期的 key - value
+        :param batch_size: 每批删除的数量（0表示一次删除）
         :return:
         """
-        with self.conn as conn:
-            sql = f"delete from {self.tbname} where expire <= ?"
-            cursor = conn.cursor()
-            cursor.execute(sql, (time.time(),))
-            return cursor.rowcount
+        if batch_size <= 0:
+            sql = f"delete from {self.tbname} where expire > 0 and expire <= ?"
+            return self._write([(sql, (time.time(),), False)], keys=())
+        rowcount = 0
+        while True:
+            n = self._write([self._sweep_statement(batch_size)], keys=())
+            rowcount += n
+            if n < batch_size:
+                return rowcount
+
+    def _sweep_statement(self, batch_size: int) -> tuple:
+        sql = (
+            f"delete from {self.tbname} where rowid in "
+            f"(select rowid from {self.tbname} where expire > 0 and expire <= ? limit ?)"
+        )
+        return sql, (time.time(), batch_size), False
 
     def execute(self, sql: str, parameters: Sequence[Any] | dict | None = None):
         """
@@ -243,10 +658,7 @@ class KValue:
         :param parameters: 参数
         :return:
         """
-        with self.conn as conn:
-            cursor = conn.cursor()
-            cursor.execute(sql, parameters or ())
-            return cursor.rowcount
+        return self._write([(sql, parameters or (), False)])
 
     def executemany(self, sql: str, parameters: Sequence[Any] | dict | None = None):
         """
@@ -255,10 +667,7 @@ class KValue:
         :param parameters: 参数
         :return:
         """
-        with self.conn as conn:
-            cursor = conn.cursor()
-            cursor.executemany(sql, parameters or [])
-            return cursor.rowcount
+        return self._write([(sql, parameters or [], True)])
 
     def fetchone(self, sql: str, parameters: Sequence[Any] | dict | None = None):
         """
@@ -290,6 +699,269 @@ class KValue:
         :return:
         """
         if os.path.isfile(self.file):
-            if self.conn:
-                self.conn.close()
+            self.close()
             os.remove(self.file)
+            for suffix in ("-wal", "-shm"):
+                if os.path.isfile(self.file + suffix):
+                    os.remove(self.file + suffix)
+
+
+def _json_dumps(value) -> bytes:
+    data = json.dumps(value)
+    return data.encode() if isinstance(data, str) else data
+
+
+def _msgpack() -> tuple:
+    try:
+        import msgpack
+    except ImportError as err:
+        raise ImportError(f"{err} (pip install msgpack)") from err
+    return msgpack.packb, lambda data: msgpack.unpackb(data, raw=False)
+
+
+def _zstd() -> tuple:
+    try:
+        from compression import zstd
+
+        return zstd.compress, zstd.decompress
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError as err:
+        raise ImportError(f"{err} (pip install zstandard)") from err
+    return zstandard.ZstdCompressor().compress, zstandard.ZstdDecompressor().decompress
+
+
+# 名称 -> 返回 (编码, 解码) 的工厂（可选依赖在首次使用时导入）
+_codecs = {
+    "json": lambda: (_json_dumps, json.loads),
+    "msgpack": _msgpack,
+    "pickle": lambda: (pickle.dumps, pickle.loads),
+    "bytes": lambda: (bytes, bytes),
+}
+_compressors = {
+    "zlib": lambda: (zlib.compress, zlib.decompress),
+    "zstd": _zstd,
+}
+_resolved = {}
+
+
+def _codec(name: str, registry: dict = _codecs) -> tuple:
+    factory = registry.get(name)
+    if factory is None:
+        raise ValueError(f'"{"codec" if registry is _codecs else "compress"}" only supported: {", ".join(registry)}')
+    pair = _resolved.get(factory)
+    if pair is None:
+        pair = _resolved[factory] = factory()
+    return pair
+
+
+class _ReadCache:
+    """
+    读缓存：进程内LRU（带过期时间），项为 (value, expire)
+    - 按 expire（墙钟）与 ttl（单调时钟）失效，写入后按键失效
+    - 加载期间发生失效则不缓存（避免回填旧值）
+    """
+
+    def __init__(self, maxsize: int, ttl: float = 0.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._data = OrderedDict()
+        self._pending = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, key: str) -> tuple:
+        """返回 (项, None) 或 (None, 加载令牌)"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                item, deadline = entry
+                expire = item[1]
+                if deadline > time.monotonic() and not (expire and expire <= time.time()):
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return item, None
+                del self._data[key]
+            self.misses += 1
+            token = self._pending[key] = object()
+            return None, token
+
+    def store(self, key: str, item: tuple, token: object):
+        expire = item[1]
+        if expire and expire <= time.time():
+            return
+        deadline = time.monotonic() + self.ttl if self.ttl else float("inf")
+        with self._lock:
+            if self._pending.get(key) is not token:
+                return
+            del self._pending[key]
+            self._data[key] = (item, deadline)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, keys: Iterable[str] | None = None):
+        with self._lock:
+            if keys is None:
+                self.invalidations += len(self._data)
+                self._data.clear()
+                self._pending.clear()
+                return
+            for key in keys:
+                self._pending.pop(key, None)
+                if self._data.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def sync(self, conn_id: int, data_version: int):
+        """data_version 变化（其他连接已提交写入）则清空"""
+        if self._versions.get(conn_id, data_version) != data_version:
+            self.invalidate()
+        self._versions[conn_id] = data_version
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "invalidations": self.invalidations,
+            "size": len(self._data),
+        }
+
+
+class _Sweeper:
+    """
+    后台清理过期键：定期按小批量删除（走索引，批间让出写锁）
+    """
+
+    def __init__(self, kv: KValue, interval: float, batch_size: int = 500):
+        self.kv = kv
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        conn = self.kv._connect(check_same_thread=False)
+        while not self._stopped.wait(self.interval):
+            with suppress(sqlite3.Error):
+                self._sweep(conn)
+
+    def _sweep(self, conn: sqlite3.Connection):
+        while not self._stopped.is_set():
+            statements = [self.kv._sweep_statement(self.batch_size)]
+            if self.kv._writer is not None:
+                n = self.kv._writer.submit(statements)
+            else:
+                n = self.kv._retry_busy(KValue._execute_statements, conn, statements)
+            if n < self.batch_size:
+                return
+            time.sleep(0)
+
+
+class _ThreadOwner:
+    """线程连接的持有者（随thread-local回收，触发关闭连接）"""
+
+    __slots__ = ("__weakref__",)
+
+
+def _close_conn(conns: list, conn: sqlite3.Connection):
+    with suppress(ValueError):
+        conns.remove(conn)
+    conn.close()
+
+
+def _run_statements(cursor: sqlite3.Cursor, statements: list[tuple[str, Any, bool]]) -> int:
+    rowcount = 0
+    for sql, parameters, many in statements:
+        if many:
+            cursor.executemany(sql, parameters)
+        else:
+            cursor.execute(sql, parameters)
+        rowcount += cursor.rowcount
+    return rowcount
+
+
+def _is_busy(e: sqlite3.OperationalError) -> bool:
+    errmsg = str(e).lower()
+    return "locked" in errmsg or "busy" in errmsg
+
+
+class _GroupWriter:
+    """
+    单写线程：各线程的写入排队，每批在一个事务中执行（组提交）
+    - 批量事务失败时逐条重试，异常只返回给对应的调用方
+    """
+
+    def __init__(self, kv: KValue, interval: float = 0.0, max_batch: int = 1000):
+        self.kv = kv
+        self.interval = interval
+        self.max_batch = max_batch
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, statements: list) -> int:
+        future = Future()
+        self._queue.put((statements, future))
+        return future.result()
+
+    def stop(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        conn = self.kv._connect(check_same_thread=False)
+        stopped = False
+        while not stopped:
+            item = self._queue.get()
+            if item is None:
+                break
+            items = [item]
+            deadline = time.monotonic() + self.interval
+            while len(items) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopped = True
+                    break
+                items.append(item)
+            self._commit(conn, items)
+
+    def _commit(self, conn: sqlite3.Connection, items: list):
+        # 任何异常都不能使写线程退出，且每个future都必须被设置（否则调用方永久阻塞）
+        try:
+            results = self.kv._retry_busy(self._execute_batch, conn, items)
+        except Exception:
+            results = None
+        if results is not None:
+            for (_, future), rowcount in zip(items, results, strict=True):
+                future.set_result(rowcount)
+            return
+        for statements, future in items:
+            try:
+                future.set_result(self.kv._retry_busy(KValue._execute_statements, conn, statements))
+            except Exception as e:
+                future.set_exception(e)
+
+    @staticmethod
+    def _execute_batch(conn: sqlite3.Connection, items: list) -> list[int]:
+        results = []
+        with conn:
+            cursor = conn.cursor()
+            for statements, _ in items:
+                results.append(_run_statements(cursor, statements))
+        return results
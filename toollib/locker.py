@@ -7,14 +7,40 @@
 @history
 """
 
+import asyncio
+import inspect
+import threading
 import time
+import uuid
+from collections.abc import Callable
+from typing import Literal
 
-from redis.exceptions import WatchError
+__all__ = [
+    "Locker",
+    "AsyncLocker",
+    "RWLocker",
+    "AsyncRWLocker",
+    "Semaphore",
+    "AsyncSemaphore",
+    "RateLimiter",
+    "AsyncRateLimiter",
+]
 
-__all__ = ["Locker"]
 
+class _LuaScripts:
+    """lua脚本注册缓存（evalsha，NOSCRIPT时自动重新加载）"""
 
-class Locker:
+    redis_cli = None
+    _scripts: dict
+
+    def _script(self, name: str):
+        script = self._scripts.get(name)
+        if script is None:
+            script = self._scripts[name] = self.redis_cli.register_script(getattr(self, f"_lua_{name}"))
+        return script
+
+
+class Locker(_LuaScripts):
     """
     锁，基于redis的分布式锁
 
@@ -37,6 +63,18 @@ class Locker:
                     a += 1
                     print(f'a: {a}')
 
+        # 另：长任务续期（仅持有者可续期）
+        locker.extend(30)
+
+        # 另：看门狗自动续期（每隔timeout*renew_ratio续期，续期失败则置位lost并回调on_lost）
+        locker = Locker(redis_cli, timeout=30, watchdog=True, on_lost=lambda lk: print("lock lost"))
+
+        # 另：可重入（同一持有者标识可多次获取，释放相同次数后才真正释放）
+        locker = Locker(redis_cli, reentrant=True)
+
+        # 另：竞争激烈时使用通知等待（释放时发布消息唤醒等待者，未收到则指数退避重试）
+        locker = Locker(redis_cli, wait_mode="notify")
+
         +++++[更多详见参数或源码]+++++
     """
 
@@ -46,7 +84,13 @@ class Locker:
         acquire_timeout: int = 2,
         timeout: int = 30,
         lock_name: str = "locker",
-        lock_value: str = "locker!@#",
+        lock_value: str | None = None,
+        wait_mode: Literal["poll", "notify"] = "poll",
+        max_backoff: float = 0.5,
+        watchdog: bool = False,
+        renew_ratio: float = 1 / 3,
+        on_lost: Callable | None = None,
+        reentrant: bool = False,
     ):
         """
         初始化
@@ -54,14 +98,95 @@ class Locker:
         :param acquire_timeout: 获取锁的超时时间
         :param timeout: 锁的过期时间
         :param lock_name: 锁名
-        :param lock_value: 锁值
+        :param lock_value: 锁值（持有者标识），为空则每个实例随机生成
+        :param wait_mode: 等待方式：poll-每2毫秒轮询，notify-订阅释放通知（指数退避兜底）
+        :param max_backoff: notify方式的最大退避间隔（秒）
+        :param watchdog: 是否启用看门狗（持有期间后台自动续期，释放时停止）
+        :param renew_ratio: 续期间隔占锁过期时间的比例
+        :param on_lost: 续期失败（锁丢失）时的回调，参数为锁实例
+        :param reentrant: 是否可重入（按锁值计数，需与不可重入锁使用不同锁名）
         """
         self.redis_cli = redis_cli
         self.acquire_timeout = acquire_timeout
         self.timeout = timeout
         self.lock_name = lock_name if lock_name else "locker"
-        self.lock_value = lock_value if lock_value else "locker!@#"
+        self.lock_value = lock_value if lock_value else uuid.uuid4().hex
+        self.wait_mode = wait_mode
+        self.max_backoff = max_backoff
+        self.channel = f"{self.lock_name}:released"
+        self.watchdog = watchdog
+        self.renew_ratio = renew_ratio
+        self.on_lost = on_lost
+        self.lost = threading.Event()
+        self.reentrant = reentrant
         self.is_lock = False
+        self.hold_count = 0
+        self._scripts = {}
+        self._watchdog_stop = None
+
+    # 比较并删除：KEYS=[锁名, 通知频道], ARGV=[锁值]，返回剩余持有次数(非持有者为-1)
+    _lua_release = """
+        if redis.call('get', KEYS[1]) == ARGV[1] then
+            redis.call('del', KEYS[1])
+            redis.call('publish', KEYS[2], 1)
+            return 0
+        end
+        return -1
+    """
+
+    # 比较并续期：KEYS=[锁名], ARGV=[锁值, 过期毫秒]
+    _lua_extend = """
+        if redis.call('get', KEYS[1]) == ARGV[1] then
+            return redis.call('pexpire', KEYS[1], ARGV[2])
+        end
+        return 0
+    """
+
+    # 可重入获取：KEYS=[锁名], ARGV=[锁值, 过期毫秒]，返回持有次数(未获取为0)
+    _lua_reentrant_acquire = """
+        if redis.call('exists', KEYS[1]) == 0 or redis.call('hexists', KEYS[1], ARGV[1]) == 1 then
+            local n = redis.call('hincrby', KEYS[1], ARGV[1], 1)
+            redis.call('pexpire', KEYS[1], ARGV[2])
+            return n
+        end
+        return 0
+    """
+
+    # 可重入释放：KEYS=[锁名, 通知频道], ARGV=[锁值]，返回剩余持有次数(非持有者为-1)
+    _lua_reentrant_release = """
+        if redis.call('hexists', KEYS[1], ARGV[1]) == 0 then
+            return -1
+        end
+        local n = redis.call('hincrby', KEYS[1], ARGV[1], -1)
+        if n > 0 then
+            return n
+        end
+        redis.call('del', KEYS[1])
+        redis.call('publish', KEYS[2], 1)
+        return 0
+    """
+
+    # 可重入续期：KEYS=[锁名], ARGV=[锁值, 过期毫秒]
+    _lua_reentrant_extend = """
+        if redis.call('hexists', KEYS[1], ARGV[1]) == 1 then
+            return redis.call('pexpire', KEYS[1], ARGV[2])
+        end
+        return 0
+    """
+
+    def _lock_script(self) -> tuple | None:
+        """获取锁的脚本调用(名称, keys, args)，为空则使用set nx"""
+        if not self.reentrant:
+            return None
+        return "reentrant_acquire", [self.lock_name], [self.lock_value, int(self.timeout * 1000)]
+
+    def _release_script(self) -> tuple:
+        name = "reentrant_release" if self.reentrant else "release"
+        return name, [self.lock_name, self.channel], [self.lock_value]
+
+    def _extend_script(self, ttl: int) -> tuple:
+        name = "reentrant_extend" if self.reentrant else "extend"
+        return name, [self.lock_name], [self.lock_value, ttl]
 
     def acquire(self, acquire_timeout: int | float | None = None, timeout: int | None = None) -> bool:
         """
@@ -75,43 +200,696 @@ class Locker:
         if timeout is not None:
             self.timeout = timeout
         self._acquire_lock()
+        if self.is_lock and self.watchdog and self._watchdog_stop is None:
+            self._start_watchdog()
         return self.is_lock
 
     def _acquire_lock(self):
         end_time = time.time() + self.acquire_timeout
+        if self.wait_mode == "notify":
+            self._wait_notify(end_time)
+            return
         while time.time() < end_time:
-            if self.redis_cli.set(self.lock_name, self.lock_value, ex=self.timeout, nx=True):
-                self.is_lock = True
+            if self._try_lock():
                 break
-            elif self.redis_cli.ttl(self.lock_name) == -1:
-                self.redis_cli.expire(self.lock_name, self.timeout)
             time.sleep(0.002)
 
+    def _try_lock(self) -> bool:
+        call = self._lock_script()
+        if call:
+            name, keys, args = call
+            self.hold_count = self._script(name)(keys=keys, args=args)
+            self.is_lock = self.hold_count > 0
+        elif self.redis_cli.set(self.lock_name, self.lock_value, ex=self.timeout, nx=True):
+            self.is_lock = True
+            self.hold_count = 1
+        elif self.redis_cli.ttl(self.lock_name) == -1:
+            self.redis_cli.expire(self.lock_name, self.timeout)
+        return self.is_lock
+
+    def _wait_notify(self, end_time: float):
+        if self._try_lock():
+            return
+        pubsub = self.redis_cli.pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(self.channel)
+            backoff = 0.002
+            while not self._try_lock():
+                remaining = end_time - time.time()
+                if remaining <= 0:
+                    break
+                if pubsub.get_message(timeout=min(backoff, remaining)) is None:
+                    backoff = min(backoff * 2, self.max_backoff)
+        finally:
+            pubsub.close()
+
+    def _start_watchdog(self):
+        self.lost.clear()
+        self._watchdog_stop = threading.Event()
+        threading.Thread(target=self._run_watchdog, args=(self._watchdog_stop,), daemon=True).start()
+
+    def _run_watchdog(self, stop: threading.Event):
+        last_renewed = time.monotonic()
+        while not stop.wait(self.timeout * self.renew_ratio):
+            try:
+                renewed = self.extend()
+            except Exception:
+                # 网络等异常：在锁过期前继续重试
+                if time.monotonic() - last_renewed < self.timeout:
+                    continue
+                renewed = False
+            if stop.is_set():
+                return
+            if renewed:
+                last_renewed = time.monotonic()
+                continue
+            # 复位状态：下次acquire可重新获取并启动看门狗
+            self.is_lock = False
+            self.hold_count = 0
+            if self._watchdog_stop is stop:
+                self._watchdog_stop = None
+            self.lost.set()
+            if self.on_lost:
+                self.on_lost(self)
+            return
+
+    def _stop_watchdog(self):
+        if self._watchdog_stop is not None:
+            self._watchdog_stop.set()
+            self._watchdog_stop = None
+
     __enter__ = acquire
 
     def release(self):
         """
-        释放锁
+        释放锁（仅删除自己持有的锁，可重入时持有次数归零才真正释放）
         :return:
         """
+        if self.hold_count <= 1 or not self.is_lock:
+            self._stop_watchdog()
         if not self.is_lock:
             return
-        with self.redis_cli.pipeline() as pipe:
-            while 1:
-                try:
-                    pipe.watch(self.lock_name)
-                    lock_value = pipe.get(self.lock_name)
-                    if isinstance(lock_value, bytes):
-                        lock_value = lock_value.decode()
-                    if not lock_value:
-                        break
-                    elif lock_value == self.lock_value:
-                        pipe.multi()
-                        pipe.delete(self.lock_name)
-                        pipe.execute()
-                        break
-                except WatchError:
-                    pipe.unwatch()
+        name, keys, args = self._release_script()
+        self.hold_count = max(self._script(name)(keys=keys, args=args), 0)
+        self.is_lock = self.hold_count > 0
+
+    def extend(self, timeout: int | float | None = None) -> bool:
+        """
+        续期（仅持有者可续期）
+        :param timeout: 新的过期时间（秒），为空则取锁的过期时间
+        :return: 是否续期成功（锁已丢失则为False）
+        """
+        if not self.is_lock:
+            return False
+        ttl = int((timeout if timeout is not None else self.timeout) * 1000)
+        name, keys, args = self._extend_script(ttl)
+        return bool(self._script(name)(keys=keys, args=args))
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.release()
+
+
+class AsyncLocker(Locker):
+    """
+    锁，基于redis的分布式锁（异步版，redis_cli为redis.asyncio客户端）
+
+    e.g.::
+
+        from redis.asyncio import Redis
+
+        locker = AsyncLocker(Redis(), acquire_timeout=2)
+        if await locker.acquire():
+            ...
+            await locker.release()
+
+        # 另：async with方式
+        async with locker:
+            if locker.is_lock:
+                ...
+
+        +++++[更多详见参数或源码]+++++
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lost = asyncio.Event()
+        self._watchdog_task = None
+
+    async def acquire(self, acquire_timeout: int | float | None = None, timeout: int | None = None) -> bool:
+        """
+        获取锁
+        :param acquire_timeout: 获取锁的超时时间
+        :param timeout: 锁的过期时间
+        :return:
+        """
+        if acquire_timeout is not None:
+            self.acquire_timeout = acquire_timeout
+        if timeout is not None:
+            self.timeout = timeout
+        await self._acquire_lock()
+        if self.is_lock and self.watchdog and self._watchdog_stop is None:
+            self._start_watchdog()
+        return self.is_lock
+
+    async def _acquire_lock(self):
+        end_time = time.time() + self.acquire_timeout
+        if self.wait_mode == "notify":
+            await self._wait_notify(end_time)
+            return
+        while time.time() < end_time:
+            if await self._try_lock():
+                break
+            await asyncio.sleep(0.002)
+
+    async def _try_lock(self) -> bool:
+        call = self._lock_script()
+        if call:
+            name, keys, args = call
+            self.hold_count = await self._script(name)(keys=keys, args=args)
+            self.is_lock = self.hold_count > 0
+        elif await self.redis_cli.set(self.lock_name, self.lock_value, ex=self.timeout, nx=True):
+            self.is_lock = True
+            self.hold_count = 1
+        elif await self.redis_cli.ttl(self.lock_name) == -1:
+            await self.redis_cli.expire(self.lock_name, self.timeout)
+        return self.is_lock
+
+    async def _wait_notify(self, end_time: float):
+        if await self._try_lock():
+            return
+        pubsub = self.redis_cli.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(self.channel)
+            backoff = 0.002
+            while not await self._try_lock():
+                remaining = end_time - time.time()
+                if remaining <= 0:
+                    break
+                if await pubsub.get_message(ignore_subscribe_messages=True, timeout=min(backoff, remaining)) is None:
+                    backoff = min(backoff * 2, self.max_backoff)
+        finally:
+            await pubsub.aclose()
+
+    def _start_watchdog(self):
+        self.lost.clear()
+        self._watchdog_stop = asyncio.Event()
+        self._watchdog_task = asyncio.create_task(self._run_watchdog(self._watchdog_stop))
+
+    async def _run_watchdog(self, stop: asyncio.Event):
+        last_renewed = time.monotonic()
+        while True:
+            try:
+                await asyncio.wait_for(stop.wait(), self.timeout * self.renew_ratio)
+                return
+            except TimeoutError:
+                pass
+            try:
+                renewed = await self.extend()
+            except Exception:
+                # 网络等异常：在锁过期前继续重试
+                if time.monotonic() - last_renewed < self.timeout:
+                    continue
+                renewed = False
+            if stop.is_set():
+                return
+            if renewed:
+                last_renewed = time.monotonic()
+                continue
+            # 复位状态：下次acquire可重新获取并启动看门狗
+            self.is_lock = False
+            self.hold_count = 0
+            if self._watchdog_stop is stop:
+                self._watchdog_stop = None
+            self.lost.set()
+            if self.on_lost:
+                result = self.on_lost(self)
+                if inspect.isawaitable(result):
+                    await result
+            return
+
+    __aenter__ = acquire
+
+    async def release(self):
+        """
+        释放锁（仅删除自己持有的锁，可重入时持有次数归零才真正释放）
+        :return:
+        """
+        if self.hold_count <= 1 or not self.is_lock:
+            self._stop_watchdog()
+        if not self.is_lock:
+            return
+        name, keys, args = self._release_script()
+        self.hold_count = max(await self._script(name)(keys=keys, args=args), 0)
+        self.is_lock = self.hold_count > 0
+
+    async def extend(self, timeout: int | float | None = None) -> bool:
+        """
+        续期（仅持有者可续期）
+        :param timeout: 新的过期时间（秒），为空则取锁的过期时间
+        :return: 是否续期成功（锁已丢失则为False）
+        """
+        if not self.is_lock:
+            return False
+        ttl = int((timeout if timeout is not None else self.timeout) * 1000)
+        name, keys, args = self._extend_script(ttl)
+        return bool(await self._script(name)(keys=keys, args=args))
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.release()
+
+
+class RWLocker(Locker):
+    """
+    读写锁，基于redis的分布式锁（读共享、写独占、写优先，均可重入）
+
+    - 锁名(hash)：mode(read/write) + 各持有者的持有次数
+    - 锁名:leases(zset)：各持有者的租约到期时间（持有者异常退出时按租约清理）
+    - 锁名:writers(zset)：等待中的写者（存在时新的读者让步）
+
+    e.g.::
+
+        # 读
+        with RWLocker(redis_cli, lock_name="doc", mode="read") as ok:
+            if ok:
+                ...
+
+        # 写
+        with RWLocker(redis_cli, lock_name="doc", mode="write") as ok:
+            if ok:
+                ...
+
+        +++++[更多详见参数或源码]+++++
+    """
+
+    def __init__(self, *args, mode: Literal["read", "write"] = "read", **kwargs):
+        """
+        初始化
+        :param mode: 模式：read-读锁，write-写锁
+        :param args/kwargs: 同Locker
+        """
+        if mode not in ("read", "write"):
+            raise ValueError('"mode" only supported: read, write')
+        kwargs.setdefault("reentrant", True)
+        super().__init__(*args, **kwargs)
+        self.mode = mode
+
+    # 公共：清理过期租约，更新过期时间
+    _lua_rw_prelude = """
+        local t = redis.call('time')
+        local now = t[1] * 1000 + math.floor(t[2] / 1000)
+        local function purge()
+            for _, owner in ipairs(redis.call('zrangebyscore', KEYS[3], '-inf', now)) do
+                redis.call('hdel', KEYS[1], owner)
+            end
+            redis.call('zremrangebyscore', KEYS[3], '-inf', now)
+            if redis.call('zcard', KEYS[3]) == 0 then
+                redis.call('del', KEYS[1])
+            end
+        end
+        local function touch()
+            local last = redis.call('zrange', KEYS[3], -1, -1, 'WITHSCORES')
+            local ttl = tonumber(last[2]) - now
+            redis.call('pexpire', KEYS[1], ttl)
+            redis.call('pexpire', KEYS[3], ttl)
+        end
+    """
+
+    # 读锁：KEYS=[锁名, 写者队列, 租约], ARGV=[锁值, 过期毫秒]，返回持有次数(未获取为0)
+    _lua_rw_read_acquire = (
+        _lua_rw_prelude
+        + """
+        purge()
+        if redis.call('hget', KEYS[1], 'mode') == 'write' then
+            return 0
+        end
+        if redis.call('hexists', KEYS[1], ARGV[1]) == 0 then
+            redis.call('zremrangebyscore', KEYS[2], '-inf', now)
+            if redis.call('zcard', KEYS[2]) > 0 then
+                return 0
+            end
+        end
+        redis.call('hset', KEYS[1], 'mode', 'read')
+        local n = redis.call('hincrby', KEYS[1], ARGV[1], 1)
+        redis.call('zadd', KEYS[3], now + tonumber(ARGV[2]), ARGV[1])
+        touch()
+        return n
+    """
+    )
+
+    # 写锁：KEYS=[锁名, 写者队列, 租约], ARGV=[锁值, 过期毫秒, 等待登记毫秒]，返回持有次数(未获取为0)
+    _lua_rw_write_acquire = (
+        _lua_rw_prelude
+        + """
+        purge()
+        local exists = redis.call('exists', KEYS[1])
+        if exists == 0 or (redis.call('hget', KEYS[1], 'mode') == 'write' and redis.call('hexists', KEYS[1], ARGV[1]) == 1) then
+            redis.call('hset', KEYS[1], 'mode', 'write')
+            local n = redis.call('hincrby', KEYS[1], ARGV[1], 1)
+            redis.call('zadd', KEYS[3], now + tonumber(ARGV[2]), ARGV[1])
+            redis.call('zrem', KEYS[2], ARGV[1])
+            touch()
+            return n
+        end
+        redis.call('zadd', KEYS[2], now + tonumber(ARGV[3]), ARGV[1])
+        redis.call('pexpire', KEYS[2], ARGV[3])
+        return 0
+    """
+    )
+
+    # 释放：KEYS=[锁名, 写者队列, 租约, 通知频道], ARGV=[锁值]，返回剩余持有次数(非持有者为-1)
+    _lua_rw_release = (
+        _lua_rw_prelude
+        + """
+        if redis.call('hexists', KEYS[1], ARGV[1]) == 0 then
+            return -1
+        end
+        local n = redis.call('hincrby', KEYS[1], ARGV[1], -1)
+        if n > 0 then
+            return n
+        end
+        redis.call('hdel', KEYS[1], ARGV[1])
+        redis.call('zrem', KEYS[3], ARGV[1])
+        if redis.call('zcard', KEYS[3]) == 0 then
+            redis.call('del', KEYS[1], KEYS[3])
+        end
+        redis.call('publish', KEYS[4], 1)
+        return 0
+    """
+    )
+
+    # 续期：KEYS=[锁名, 写者队列, 租约], ARGV=[锁值, 过期毫秒]
+    _lua_rw_extend = (
+        _lua_rw_prelude
+        + """
+        if redis.call('hexists', KEYS[1], ARGV[1]) == 0 then
+            return 0
+        end
+        redis.call('zadd', KEYS[3], now + tonumber(ARGV[2]), ARGV[1])
+        touch()
+        return 1
+    """
+    )
+
+    @property
+    def _rw_keys(self) -> list:
+        return [self.lock_name, f"{self.lock_name}:writers", f"{self.lock_name}:leases"]
+
+    def _lock_script(self) -> tuple:
+        args = [self.lock_value, int(self.timeout * 1000)]
+        if self.mode == "write":
+            # 等待登记需覆盖两次重试的间隔，写者放弃后自动过期
+            args.append(int(max(self.max_backoff * 2, 1) * 1000))
+        return f"rw_{self.mode}_acquire", self._rw_keys, args
+
+    def _release_script(self) -> tuple:
+        return "rw_release", [*self._rw_keys, self.channel], [self.lock_value]
+
+    def _extend_script(self, ttl: int) -> tuple:
+        return "rw_extend", self._rw_keys, [self.lock_value, ttl]
+
+
+class AsyncRWLocker(RWLocker, AsyncLocker):
+    """
+    读写锁，基于redis的分布式锁（异步版，redis_cli为redis.asyncio客户端）
+
+    e.g.::
+
+        async with AsyncRWLocker(redis_cli, lock_name="doc", mode="read") as ok:
+            if ok:
+                ...
+
+        +++++[更多详见参数或源码]+++++
+    """
+
+
+class Semaphore(Locker):
+    """
+    信号量，基于redis的分布式计数信号量（zset记录各持有者租约，过期自动回收）
+
+    e.g.::
+
+        # 最多10个并发
+        sem = Semaphore(redis_cli, lock_name="downstream", limit=10, timeout=30)
+        with sem:
+            if sem.is_lock:
+                ...
+
+        +++++[更多详见参数或源码]+++++
+    """
+
+    def __init__(self, *args, limit: int = 1, **kwargs):
+        """
+        初始化
+        :param limit: 最大并发数
+        :param args/kwargs: 同Locker（timeout为单个租约的过期时间）
+        """
+        if not isinstance(limit, int) or limit < 1:
+            raise ValueError('"limit" greater than or equal to 1')
+        kwargs.setdefault("lock_name", "semaphore")
+        super().__init__(*args, **kwargs)
+        self.limit = limit
+
+    # 获取：KEYS=[信号量], ARGV=[锁值, 最大并发数, 过期毫秒]，返回持有次数(未获取为0)
+    _lua_sem_acquire = """
+        local t = redis.call('time')
+        local now = t[1] * 1000 + math.floor(t[2] / 1000)
+        redis.call('zremrangebyscore', KEYS[1], '-inf', now)
+        if redis.call('zscore', KEYS[1], ARGV[1]) or redis.call('zcard', KEYS[1]) < tonumber(ARGV[2]) then
+            redis.call('zadd', KEYS[1], now + tonumber(ARGV[3]), ARGV[1])
+            local last = redis.call('zrange', KEYS[1], -1, -1, 'WITHSCORES')
+            redis.call('pexpire', KEYS[1], tonumber(last[2]) - now)
+            return 1
+        end
+        return 0
+    """
+
+    # 释放：KEYS=[信号量, 通知频道], ARGV=[锁值]，返回剩余持有次数(非持有者为-1)
+    _lua_sem_release = """
+        if redis.call('zrem', KEYS[1], ARGV[1]) == 0 then
+            return -1
+        end
+        redis.call('publish', KEYS[2], 1)
+        return 0
+    """
+
+    # 续期：KEYS=[信号量], ARGV=[锁值, 过期毫秒]
+    _lua_sem_extend = """
+        if not redis.call('zscore', KEYS[1], ARGV[1]) then
+            return 0
+        end
+        local t = redis.call('time')
+        local now = t[1] * 1000 + math.floor(t[2] / 1000)
+        redis.call('zadd', KEYS[1], now + tonumber(ARGV[2]), ARGV[1])
+        local last = redis.call('zrange', KEYS[1], -1, -1, 'WITHSCORES')
+        redis.call('pexpire', KEYS[1], tonumber(last[2]) - now)
+        return 1
+    """
+
+    def _lock_script(self) -> tuple:
+        return "sem_acquire", [self.lock_name], [self.lock_value, self.limit, int(self.timeout * 1000)]
+
+    def _release_script(self) -> tuple:
+        return "sem_release", [self.lock_name, self.channel], [self.lock_value]
+
+    def _extend_script(self, ttl: int) -> tuple:
+        return "sem_extend", [self.lock_name], [self.lock_value, ttl]
+
+
+class AsyncSemaphore(Semaphore, AsyncLocker):
+    """
+    信号量，基于redis的分布式计数信号量（异步版，redis_cli为redis.asyncio客户端）
+
+    e.g.::
+
+        async with AsyncSemaphore(redis_cli, lock_name="downstream", limit=10) as ok:
+            if ok:
+                ...
+
+        +++++[更多详见参数或源码]+++++
+    """
+
+
+class RateLimiter(_LuaScripts):
+    """
+    限流器，基于redis的分布式限流（每次判断为一次原子lua调用）
+    - token_bucket：令牌桶，每period秒补充rate个令牌，桶容量为burst（默认为rate）
+    - sliding_window：滑动窗口，任意period秒内最多rate次
+
+    e.g.::
+
+        limiter = RateLimiter(redis_cli, name="api", rate=100, period=1)
+        if limiter.allow():
+            ...
+
+        # 阻塞等待直到允许（超时返回False）
+        if limiter.acquire(timeout=5):
+            ...
+
+        +++++[更多详见参数或源码]+++++
+    """
+
+    def __init__(
+        self,
+        redis_cli,
+        name: str = "ratelimiter",
+        rate: int = 10,
+        period: int | float = 1,
+        algorithm: Literal["token_bucket", "sliding_window"] = "token_bucket",
+        burst: int | None = None,
+    ):
+        """
+        初始化
+        :param redis_cli: redis客户端
+        :param name: 限流键名
+        :param rate: 每个周期允许的次数
+        :param period: 周期（秒）
+        :param algorithm: 算法：token_bucket-令牌桶，sliding_window-滑动窗口
+        :param burst: 令牌桶容量（突发上限），为空则取rate
+        """
+        if algorithm not in ("token_bucket", "sliding_window"):
+            raise ValueError('"algorithm" only supported: token_bucket, sliding_window')
+        if rate < 1 or period <= 0:
+            raise ValueError('"rate" and "period" must be greater than 0')
+        self.redis_cli = redis_cli
+        self.name = name
+        self.rate = rate
+        self.period = period
+        self.algorithm = algorithm
+        self.burst = burst or rate
+        self._scripts = {}
+
+    # 令牌桶：KEYS=[键], ARGV=[容量, 每毫秒补充令牌数, 请求令牌数]，返回需等待毫秒(0为允许)
+    _lua_token_bucket = """
+        local t = redis.call('time')
+        local now = t[1] * 1000 + t[2] / 1000
+        local capacity = tonumber(ARGV[1])
+        local rate = tonumber(ARGV[2])
+        local n = tonumber(ARGV[3])
+        local bucket = redis.call('hmget', KEYS[1], 'tokens', 'ts')
+        local tokens = tonumber(bucket[1]) or capacity
+        local ts = tonumber(bucket[2]) or now
+        tokens = math.min(capacity, tokens + math.max(now - ts, 0) * rate)
+        local wait = 0
+        if tokens >= n then
+            tokens = tokens - n
+        else
+            wait = math.ceil((n - tokens) / rate)
+        end
+        redis.call('hset', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+        redis.call('pexpire', KEYS[1], math.ceil(capacity / rate) + 1000)
+        return wait
+    """
+
+    # 滑动窗口：KEYS=[键], ARGV=[上限, 窗口毫秒, 请求次数, 成员前缀]，返回需等待毫秒(0为允许)
+    _lua_sliding_window = """
+        local t = redis.call('time')
+        local now = t[1] * 1000 + math.floor(t[2] / 1000)
+        local limit = tonumber(ARGV[1])
+        local window = tonumber(ARGV[2])
+        local n = tonumber(ARGV[3])
+        redis.call('zremrangebyscore', KEYS[1], '-inf', now - window)
+        if redis.call('zcard', KEYS[1]) + n <= limit then
+            for i = 1, n do
+                redis.call('zadd', KEYS[1], now, ARGV[4] .. ':' .. i)
+            end
+            redis.call('pexpire', KEYS[1], window)
+            return 0
+        end
+        local oldest = redis.call('zrange', KEYS[1], 0, 0, 'WITHSCORES')
+        return math.max(math.ceil(tonumber(oldest[2]) + window - now), 1)
+    """
+
+    def _limit_script(self, n: int) -> tuple:
+        limit = self.burst if self.algorithm == "token_bucket" else self.rate
+        if not 1 <= n <= limit:
+            raise ValueError(f'"n" only supported: 1 ~ {limit}')
+        period_ms = self.period * 1000
+        if self.algorithm == "token_bucket":
+            return "token_bucket", [self.name], [self.burst, self.rate / period_ms, n]
+        return "sliding_window", [self.name], [self.rate, int(period_ms), n, uuid.uuid4().hex]
+
+    def try_acquire(self, n: int = 1) -> int:
+        """
+        尝试获取
+        :param n: 次数（令牌数）
+        :return: 需等待的毫秒数（0表示已允许）
+        """
+        name, keys, args = self._limit_script(n)
+        return self._script(name)(keys=keys, args=args)
+
+    def allow(self, n: int = 1) -> bool:
+        """
+        是否允许
+        :param n: 次数（令牌数）
+        :return:
+        """
+        return self.try_acquire(n) == 0
+
+    def acquire(self, n: int = 1, timeout: int | float | None = None) -> bool:
+        """
+        阻塞获取（按返回的等待时间休眠重试）
+        :param n: 次数（令牌数）
+        :param timeout: 超时时间（秒），为空则一直等待
+        :return:
+        """
+        end_time = None if timeout is None else time.time() + timeout
+        while True:
+            wait = self.try_acquire(n) / 1000
+            if wait == 0:
+                return True
+            if end_time is not None:
+                remaining = end_time - time.time()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+class AsyncRateLimiter(RateLimiter):
+    """
+    限流器，基于redis的分布式限流（异步版，redis_cli为redis.asyncio客户端）
+
+    e.g.::
+
+        limiter = AsyncRateLimiter(redis_cli, name="api", rate=100, period=1)
+        if await limiter.allow():
+            ...
+
+        +++++[更多详见参数或源码]+++++
+    """
+
+    async def try_acquire(self, n: int = 1) -> int:
+        """
+        尝试获取
+        :param n: 次数（令牌数）
+        :return: 需等待的毫秒数（0表示已允许）
+        """
+        name, keys, args = self._limit_script(n)
+        return await self._script(name)(keys=keys, args=args)
+
+    async def allow(self, n: int = 1) -> bool:
+        """
+        是否允许
+        :param n: 次数（令牌数）
+        :return:
+        """
+        return await self.try_acquire(n) == 0
+
+    async def acquire(self, n: int = 1, timeout: int | float | None = None) -> bool:
+        """
+        阻塞获取（按返回的等待时间休眠重试）
+        :param n: 次数（令牌数）
+        :param timeout: 超时时间（秒），为空则一直等待
+        :return:
+        """
+        end_time = None if timeout is None else time.time() + timeout
+        while True:
+            wait = await self.try_acquire(n) / 1000
+            if wait == 0:
+                return True
+            if end_time is not None:
+                remaining = end_time - time.time()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            await asyncio.sleep(wait)
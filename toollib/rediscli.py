@@ -7,9 +7,100 @@
 @history
 """
 
-from redis import ConnectionPool, Redis
+import inspect
+import logging
+import queue
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import Future
+from contextlib import suppress
+from typing import Literal
 
-__all__ = ["RedisCli"]
+from redis import BlockingConnectionPool, ConnectionPool, Redis
+from redis.asyncio import BlockingConnectionPool as AsyncBlockingConnectionPool
+from redis.asyncio import ConnectionPool as AsyncConnectionPool
+from redis.asyncio import Redis as AsyncRedis
+
+__all__ = [
+    "RedisCli",
+    "AsyncRedisCli",
+    "PoolMetrics",
+]
+
+logger = logging.getLogger(__name__)
+
+# 只读命令：开启近端缓存时，其余命令执行后失效 args[0]（多键写命令失效所有键）
+_READONLY = frozenset(
+    {
+        "get",
+        "mget",
+        "exists",
+        "ttl",
+        "pttl",
+        "type",
+        "strlen",
+        "getrange",
+        "keys",
+        "scan",
+        "dbsize",
+        "ping",
+        "info",
+        "hget",
+        "hmget",
+        "hgetall",
+        "hexists",
+        "hlen",
+        "hkeys",
+        "hvals",
+        "llen",
+        "lrange",
+        "lindex",
+        "scard",
+        "smembers",
+        "sismember",
+        "zcard",
+        "zscore",
+        "zrange",
+        "zrangebyscore",
+        "zrank",
+        "publish",
+        "pubsub",
+        "pipeline",
+        "register_script",
+    }
+)
+_MULTI_KEY_WRITES = frozenset({"delete", "unlink", "mset", "msetnx"})
+
+# 不可合并到管道的命令（阻塞、订阅、非命令方法等），自动批量时直接执行
+_UNBATCHABLE = frozenset(
+    {
+        "pipeline",
+        "pubsub",
+        "register_script",
+        "lock",
+        "monitor",
+        "transaction",
+        "close",
+        "scan_iter",
+        "hscan_iter",
+        "sscan_iter",
+        "zscan_iter",
+        "blpop",
+        "brpop",
+        "brpoplpush",
+        "blmove",
+        "blmpop",
+        "bzpopmin",
+        "bzpopmax",
+        "bzmpop",
+        "xread",
+        "xreadgroup",
+        "wait",
+    }
+)
 
 
 class RedisCli:
@@ -39,6 +130,25 @@ class RedisCli:
         with redis_cli as r:
             print(r.get("name"))
 
+        # 使用方式5：批量（一次管道往返，退出时执行）
+        with redis_cli.batch() as b:
+            f1 = b.get("name")
+            f2 = b.set("age", 18)
+        print(f1.result(), f2.result(), b.results)
+
+        # 自动批量：多线程代理调用合并为一次管道往返
+        redis_cli = RedisCli(host='127.0.0.1', auto_batch=True)
+
+        # 近端缓存：代理调用get命中进程内缓存（服务端client tracking失效通知）
+        redis_cli = RedisCli(host='127.0.0.1', near_cache=True, near_cache_prefixes=["conf:", "flag:"])
+        redis_cli.get("conf:xxx")
+        print(redis_cli.near_cache.stats())
+
+        # 指标：连接池取连接等待、使用/空闲连接数、各命令耗时直方图（可接入回调或导出prometheus文本）
+        redis_cli = RedisCli(host='127.0.0.1', metrics=True, metrics_sink=lambda event, data: ...)
+        print(redis_cli.metrics.snapshot())
+        print(redis_cli.metrics.to_prometheus())
+
         +++++[更多详见参数或源码]+++++
     """
 
@@ -49,6 +159,17 @@ class RedisCli:
         db=0,
         password=None,
         max_connections=None,
+        pool_timeout: float | None = None,
+        auto_batch: bool = False,
+        batch_window: float = 0.0,
+        batch_max_size: int = 1000,
+        near_cache: bool = False,
+        near_cache_size: int = 10000,
+        near_cache_ttl: float = 60,
+        near_cache_mode: Literal["tracking", "channel"] = "tracking",
+        near_cache_prefixes: list[str] | None = None,
+        metrics: bool = False,
+        metrics_sink: Callable[[str, dict], None] | None = None,
         **kwargs,
     ):
         """
@@ -58,9 +179,31 @@ class RedisCli:
         :param db: 数据库
         :param password: 密码
         :param max_connections: 最大连接数
+        :param pool_timeout: 连接池耗尽时的等待超时（秒），指定则使用阻塞连接池（否则耗尽时直接异常）
+        :param auto_batch: 是否自动批量（代理调用排队，由后台线程合并为管道执行）
+        :param batch_window: 自动批量的合并窗口（秒），默认为0（只合并已排队的命令，不额外等待）
+        :param batch_max_size: 自动批量的单次最大命令数
+        :param near_cache: 是否启用近端缓存（代理调用get优先读进程内LRU缓存）
+        :param near_cache_size: 近端缓存最大条数
+        :param near_cache_ttl: 近端缓存过期时间（秒，失效通知丢失时的兜底）
+        :param near_cache_mode: 失效方式：tracking-服务端client tracking（redis>=6），channel-订阅失效频道（写入方调用invalidate）
+        :param near_cache_prefixes: tracking方式只跟踪这些前缀的键（为空则跟踪全部）
+        :param metrics: 是否启用指标采集（未启用时无额外开销）
+        :param metrics_sink: 指标回调(event, data)，event为checkout或command（指定则启用指标采集）
         :param kwargs: 其他参数
         """
-        self._redis_pool = ConnectionPool(
+        if pool_timeout is not None:
+            kwargs["timeout"] = pool_timeout
+            pool_cls = BlockingConnectionPool
+        else:
+            pool_cls = ConnectionPool
+        self.metrics = None
+        self._redis_cls = Redis
+        if metrics or metrics_sink:
+            self.metrics = PoolMetrics(sink=metrics_sink, pool_stats=self.pool_stats)
+            pool_cls = type(f"Metrics{pool_cls.__name__}", (_MetricsPoolMixin, pool_cls), {"metrics": self.metrics})
+            self._redis_cls = type("MetricsRedis", (_MetricsRedisMixin, Redis), {"metrics": self.metrics})
+        self._redis_pool = pool_cls(
             host=host,
             port=port,
             db=db,
@@ -68,19 +211,91 @@ class RedisCli:
             max_connections=max_connections,
             **kwargs,
         )
+        self._batcher = _AutoBatcher(self, batch_window, batch_max_size) if auto_batch else None
+        self.near_cache = None
+        if near_cache:
+            self.near_cache = NearCache(
+                self,
+                maxsize=near_cache_size,
+                ttl=near_cache_ttl,
+                mode=near_cache_mode,
+                prefixes=near_cache_prefixes,
+            )
 
     def connection(self) -> Redis:
         """
         创建连接
         :return:
         """
-        return Redis(connection_pool=self._redis_pool)
+        return self._redis_cls(connection_pool=self._redis_pool)
+
+    def pool_stats(self) -> dict:
+        """
+        连接池状态
+        :return: {'max': 最大连接数, 'created': 已创建, 'in_use': 使用中, 'idle': 空闲}
+        """
+        pool = self._redis_pool
+        if isinstance(pool, BlockingConnectionPool):
+            created = len(pool._connections)
+            idle = sum(1 for conn in list(pool.pool.queue) if conn is not None)
+            in_use = created - idle
+        else:
+            in_use = len(pool._in_use_connections)
+            idle = len(pool._available_connections)
+            created = in_use + idle
+        return {"max": pool.max_connections, "created": created, "in_use": in_use, "idle": idle}
+
+    def batch(self, transaction: bool = False) -> "Batch":
+        """
+        批量（收集代理调用，退出上下文时一次管道执行）
+        :param transaction: 是否事务（multi/exec）
+        :return:
+        """
+        return Batch(self, transaction=transaction)
+
+    def invalidate(self, *keys):
+        """
+        失效近端缓存（channel方式会发布到失效频道，通知其他进程）
+        :param keys: 键
+        :return:
+        """
+        if self.near_cache is not None:
+            self.near_cache.invalidate(*keys, publish=True)
+
+    def _invalidate_written(self, cmd: str, args: tuple):
+        """写命令执行后失效本进程近端缓存（channel方式同时发布给其他进程）"""
+        if self.near_cache is None or cmd in _READONLY or not args:
+            return
+        keys = [args[0]]
+        if cmd in _MULTI_KEY_WRITES:
+            keys = list(args[0]) if isinstance(args[0], dict) else list(args)
+        keys = [key for key in keys if isinstance(key, (str, bytes))]
+        if keys:
+            self.near_cache.invalidate(*keys, publish=True)
 
     def __getattr__(self, cmd):
-        def _exec_cmd(*args, **kwargs):
-            with self.connection() as conn:
-                return getattr(conn, cmd)(*args, **kwargs)
+        if cmd.startswith("_"):
+            raise AttributeError(cmd)
+        if self._batcher is not None and cmd not in _UNBATCHABLE:
 
+            def _exec_cmd(*args, **kwargs):
+                return self._batcher.submit(cmd, args, kwargs).result()
+
+        else:
+
+            def _exec_cmd(*args, **kwargs):
+                with self.connection() as conn:
+                    try:
+                        return getattr(conn, cmd)(*args, **kwargs)
+                    finally:
+                        self._invalidate_written(cmd, args)
+
+        if cmd == "get" and self.near_cache is not None:
+
+            def _cached_get(name):
+                return self.near_cache.get(name, _exec_cmd)
+
+            return _cached_get
         return _exec_cmd
 
     def __enter__(self):
@@ -88,3 +303,560 @@ class RedisCli:
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         pass
+
+
+class PoolMetrics:
+    """
+    连接池指标：取连接等待耗时、各命令耗时（直方图）、连接数
+    - 管道（batch/auto_batch）中的命令按整批往返耗时计
+
+    e.g.::
+
+        metrics = redis_cli.metrics
+        metrics.snapshot()
+        metrics.to_prometheus(prefix="redis")
+
+        +++++[更多详见参数或源码]+++++
+    """
+
+    buckets = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, float("inf"))
+
+    def __init__(self, sink: Callable[[str, dict], None] | None = None, pool_stats: Callable[[], dict] | None = None):
+        """
+        初始化
+        :param sink: 指标回调(event, data)
+        :param pool_stats: 连接池状态获取函数
+        """
+        self.sink = sink
+        self.pool_stats = pool_stats
+        self._lock = threading.Lock()
+        self._checkout = self._new_histogram()
+        self._checkout_errors = 0
+        self._commands = {}
+        self._errors = {}
+
+    def _new_histogram(self) -> list:
+        # [各桶计数..., 总数, 总耗时]
+        return [0] * len(self.buckets) + [0, 0.0]
+
+    def _observe(self, histogram: list, seconds: float):
+        histogram[bisect_left(self.buckets, seconds)] += 1
+        histogram[-2] += 1
+        histogram[-1] += seconds
+
+    def observe_checkout(self, seconds: float, error: bool = False):
+        with self._lock:
+            self._observe(self._checkout, seconds)
+            if error:
+                self._checkout_errors += 1
+        if self.sink:
+            self.sink("checkout", {"seconds": seconds, "error": error})
+
+    def observe_command(self, command: str, seconds: float, error: bool = False):
+        with self._lock:
+            histogram = self._commands.get(command)
+            if histogram is None:
+                histogram = self._commands[command] = self._new_histogram()
+            self._observe(histogram, seconds)
+            if error:
+                self._errors[command] = self._errors.get(command, 0) + 1
+        if self.sink:
+            self.sink("command", {"command": command, "seconds": seconds, "error": error})
+
+    def _summary(self, histogram: list) -> dict:
+        count, total = histogram[-2], histogram[-1]
+        return {
+            "count": count,
+            "sum": total,
+            "avg": total / count if count else 0.0,
+            "buckets": dict(zip(self.buckets, histogram[: len(self.buckets)], strict=True)),
+        }
+
+    def snapshot(self) -> dict:
+        """
+        快照
+        :return:
+        """
+        with self._lock:
+            data = {
+                "checkout": self._summary(self._checkout),
+                "checkout_errors": self._checkout_errors,
+                "commands": {cmd: self._summary(h) for cmd, h in self._commands.items()},
+                "errors": dict(self._errors),
+            }
+        data["pool"] = self.pool_stats() if self.pool_stats else {}
+        return data
+
+    def to_prometheus(self, prefix: str = "toollib_redis") -> str:
+        """
+        导出prometheus文本格式
+        :param prefix: 指标名前缀
+        :return:
+        """
+        snap = self.snapshot()
+        lines = []
+
+        def _histogram(name: str, summary: dict, labels: str = ""):
+            cumulative = 0
+            for le, count in summary["buckets"].items():
+                cumulative += count
+                le_text = "+Inf" if le == float("inf") else repr(le)
+                sep = "," if labels else ""
+                lines.append(f'{name}_bucket{{{labels}{sep}le="{le_text}"}} {cumulative}')
+            label_text = f"{{{labels}}}" if labels else ""
+            lines.append(f"{name}_sum{label_text} {summary['sum']}")
+            lines.append(f"{name}_count{label_text} {summary['count']}")
+
+        lines.append(f"# TYPE {prefix}_checkout_seconds histogram")
+        _histogram(f"{prefix}_checkout_seconds", snap["checkout"])
+        lines.append(f"# TYPE {prefix}_checkout_errors_total counter")
+        lines.append(f"{prefix}_checkout_errors_total {snap['checkout_errors']}")
+        lines.append(f"# TYPE {prefix}_command_seconds histogram")
+        for cmd, summary in snap["commands"].items():
+            _histogram(f"{prefix}_command_seconds", summary, f'command="{cmd}"')
+        lines.append(f"# TYPE {prefix}_command_errors_total counter")
+        for cmd, count in snap["errors"].items():
+            lines.append(f'{prefix}_command_errors_total{{command="{cmd}"}} {count}')
+        lines.append(f"# TYPE {prefix}_pool_connections gauge")
+        for state, value in snap["pool"].items():
+            if value is not None:
+                lines.append(f'{prefix}_pool_connections{{state="{state}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+class _MetricsPoolMixin:
+    metrics: PoolMetrics
+
+    def get_connection(self, *args, **kwargs):
+        start = time.perf_counter()
+        error = False
+        try:
+            return super().get_connection(*args, **kwargs)
+        except Exception:
+            # 如阻塞连接池等待超时
+            error = True
+            raise
+        finally:
+            self.metrics.observe_checkout(time.perf_counter() - start, error)
+
+
+class _MetricsRedisMixin:
+    metrics: PoolMetrics
+
+    def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        error = False
+        try:
+            return super().execute_command(*args, **options)
+        except Exception:
+            error = True
+            raise
+        finally:
+            command = args[0] if isinstance(args[0], str) else str(args[0])
+            self.metrics.observe_command(command.upper(), time.perf_counter() - start, error)
+
+
+class NearCache:
+    """
+    近端缓存：进程内LRU（带过期时间），由后台线程接收失效通知
+    - tracking：client tracking（BCAST）重定向到订阅连接，服务端键变更即失效
+    - channel：订阅失效频道，写入方通过RedisCli.invalidate发布
+    通知连接断开期间不使用缓存，重连后清空（失败原因见last_error/stats()）
+    - 经同一RedisCli执行的写命令会立即失效本进程缓存（channel方式同时发布）
+    """
+
+    channel = "toollib:near-cache:invalidate"
+
+    def __init__(
+        self,
+        redis_cli: RedisCli,
+        maxsize: int = 10000,
+        ttl: float = 60,
+        mode: Literal["tracking", "channel"] = "tracking",
+        prefixes: list[str] | None = None,
+    ):
+        if mode not in ("tracking", "channel"):
+            raise ValueError('"mode" only supported: tracking, channel')
+        self.redis_cli = redis_cli
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.mode = mode
+        self.prefixes = prefixes or []
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.last_error = None
+        self._data = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        threading.Thread(target=self._listen, daemon=True).start()
+
+    def get(self, key, loader):
+        if not self._ready.is_set():
+            self.misses += 1
+            return loader(key)
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[1] > now:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return item[0]
+            self.misses += 1
+            token = self._pending[key] = object()
+        value = loader(key)
+        with self._lock:
+            # 加载期间收到失效通知则不缓存
+            if self._pending.get(key) is token:
+                del self._pending[key]
+                self._data[key] = (value, now + self.ttl)
+                self._data.move_to_end(key)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+        return value
+
+    def invalidate(self, *keys, publish: bool = False):
+        with self._lock:
+            for key in keys:
+                variants = (key, key.decode()) if isinstance(key, bytes) else (key, key.encode())
+                for k in variants:
+                    self._pending.pop(k, None)
+                    if self._data.pop(k, None) is not None:
+                        self.invalidations += 1
+        if publish and self.mode == "channel":
+            with self.redis_cli.connection() as conn:
+                for key in keys:
+                    conn.publish(self.channel, key)
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._data)
+            self._data.clear()
+            self._pending.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "invalidations": self.invalidations,
+            "size": len(self._data),
+            "ready": self._ready.is_set(),
+            "last_error": repr(self.last_error) if self.last_error else None,
+        }
+
+    def _on_message(self, data):
+        if data is None or data in (b"*", "*"):
+            self.clear()
+        elif isinstance(data, list):
+            self.invalidate(*data)
+        else:
+            self.invalidate(data)
+
+    def _listen(self):
+        backoff = 0.1
+        while True:
+            try:
+                if self.mode == "tracking":
+                    self._listen_tracking()
+                else:
+                    self._listen_channel()
+            except Exception as e:
+                # 连续失败只记录一次（如服务端不支持CLIENT TRACKING），期间不使用缓存
+                if self.last_error is None:
+                    logger.warning(f"near cache ({self.mode}) unavailable, retrying: {e!r}")
+                self.last_error = e
+            self._ready.clear()
+            self.clear()
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 5)
+
+    def _listen_channel(self):
+        pubsub = self.redis_cli.connection().pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(self.channel)
+            self.clear()
+            self.last_error = None
+            self._ready.set()
+            while True:
+                message = pubsub.get_message(timeout=1)
+                if message:
+                    self._on_message(message["data"])
+        finally:
+            pubsub.close()
+
+    def _listen_tracking(self):
+        pool = self.redis_cli._redis_pool
+        # 专用连接不计入连接池（否则每次重连都会占用池的名额）
+        sub = pool.connection_class(**pool.connection_kwargs)
+        tracker = pool.connection_class(**pool.connection_kwargs)
+        try:
+            sub.send_command("CLIENT", "ID")
+            client_id = sub.read_response()
+            args = ["CLIENT", "TRACKING", "ON", "REDIRECT", client_id, "BCAST"]
+            for prefix in self.prefixes:
+                args.extend(["PREFIX", prefix])
+            tracker.send_command(*args)
+            tracker.read_response()
+            sub.send_command("SUBSCRIBE", "__redis__:invalidate")
+            sub.read_response()
+            self.clear()
+            self.last_error = None
+            self._ready.set()
+            while True:
+                if sub.can_read(timeout=1):
+                    message = sub.read_response()
+                    if message and message[0] in (b"message", "message"):
+                        self._on_message(message[2])
+                else:
+                    # 跟踪连接断开则不再有失效通知，需要重连
+                    tracker.send_command("PING")
+                    tracker.read_response()
+        finally:
+            sub.disconnect()
+            tracker.disconnect()
+
+
+class AsyncRedisCli:
+    """
+    redis客户端（异步版，基于redis.asyncio）
+
+    e.g.::
+
+        # 创建
+        redis_cli = AsyncRedisCli(host='127.0.0.1', max_connections=100, health_check_interval=30, pool_timeout=5)
+
+        # 使用方式1：标准用法
+        r = redis_cli.connection()
+        print(await r.get("name"))
+        await r.aclose()
+
+        # 使用方式2：代理调用
+        print(await redis_cli.get("name"))
+
+        # 使用方式3：上下文管理器
+        async with redis_cli.connection() as r:
+            print(await r.get("name"))
+
+        # 使用方式4：上下文管理器（简洁写法）
+        async with redis_cli as r:
+            print(await r.get("name"))
+
+        # 关闭连接池
+        await redis_cli.aclose()
+
+        +++++[更多详见参数或源码]+++++
+    """
+
+    def __init__(
+        self,
+        host="localhost",
+        port=6379,
+        db=0,
+        password=None,
+        max_connections=None,
+        health_check_interval: int = 0,
+        pool_timeout: float | None = None,
+        **kwargs,
+    ):
+        """
+        初始化
+        :param host: host
+        :param port: 端口
+        :param db: 数据库
+        :param password: 密码
+        :param max_connections: 最大连接数
+        :param health_check_interval: 健康检查间隔（秒），连接空闲超过该时间再使用前先ping
+        :param pool_timeout: 连接池耗尽时的等待超时（秒），指定则使用阻塞连接池（否则耗尽时直接异常）
+        :param kwargs: 其他参数
+        """
+        if pool_timeout is not None:
+            kwargs["timeout"] = pool_timeout
+            pool_cls = AsyncBlockingConnectionPool
+        else:
+            pool_cls = AsyncConnectionPool
+        self._redis_pool = pool_cls(
+            host=host,
+            port=port,
+            db=db,
+            password=password,
+            max_connections=max_connections,
+            health_check_interval=health_check_interval,
+            **kwargs,
+        )
+
+    def connection(self) -> AsyncRedis:
+        """
+        创建连接
+        :return:
+        """
+        return AsyncRedis(connection_pool=self._redis_pool)
+
+    async def aclose(self):
+        """
+        关闭连接池
+        :return:
+        """
+        await self._redis_pool.disconnect()
+
+    def __getattr__(self, cmd):
+        if cmd.startswith("_"):
+            raise AttributeError(cmd)
+
+        def _exec_cmd(*args, **kwargs):
+            conn = self.connection()
+            result = getattr(conn, cmd)(*args, **kwargs)
+            # pipeline、pubsub、register_script等非协程方法直接返回
+            if inspect.isawaitable(result):
+                return _await_close(conn, result)
+            return result
+
+        return _exec_cmd
+
+    async def __aenter__(self):
+        return self.connection()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+async def _await_close(conn: AsyncRedis, result):
+    try:
+        return await result
+    finally:
+        await conn.aclose()
+
+
+class Batch:
+    """
+    批量：代理调用返回Future，退出上下文时一次管道执行并填充结果
+    """
+
+    def __init__(self, redis_cli: RedisCli, transaction: bool = False):
+        self.redis_cli = redis_cli
+        self.transaction = transaction
+        self.results = None
+        self._commands = []
+
+    def __getattr__(self, cmd):
+        if cmd.startswith("_"):
+            raise AttributeError(cmd)
+
+        def _add_cmd(*args, **kwargs) -> Future:
+            future = Future()
+            self._commands.append((cmd, args, kwargs, future))
+            return future
+
+        return _add_cmd
+
+    def execute(self) -> list:
+        """
+        执行（清空已收集的命令）
+        :return: 结果列表
+        """
+        commands, self._commands = self._commands, []
+        self.results = _execute_pipeline(self.redis_cli, commands, transaction=self.transaction)
+        return self.results
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.execute()
+
+
+class _AutoBatcher:
+    """
+    自动批量：后台线程将排队的代理调用合并为管道执行
+    """
+
+    def __init__(self, redis_cli: RedisCli, window: float = 0.0, max_size: int = 1000):
+        self.redis_cli = redis_cli
+        self.window = window
+        self.max_size = max_size
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, cmd: str, args: tuple, kwargs: dict) -> Future:
+        future = Future()
+        self._queue.put((cmd, args, kwargs, future))
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, daemon=True)
+                    self._thread.start()
+        return future
+
+    def _run(self):
+        while True:
+            commands = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(commands) < self.max_size:
+                try:
+                    if self.window > 0:
+                        timeout = deadline - time.monotonic()
+                        if timeout <= 0:
+                            break
+                        commands.append(self._queue.get(timeout=timeout))
+                    else:
+                        commands.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            # 异常已写入各future，由调用方抛出
+            with suppress(Exception):
+                _execute_pipeline(self.redis_cli, commands)
+
+
+def _execute_pipeline(redis_cli: RedisCli, commands: list, transaction: bool = False) -> list:
+    """管道执行[(命令, args, kwargs, future)]，结果（或异常）写入各future"""
+    if not commands:
+        return []
+    results, queued = [None] * len(commands), []
+    start, failed = time.perf_counter(), False
+    try:
+        with redis_cli.connection() as conn, conn.pipeline(transaction=transaction) as pipe:
+            encoder = conn.get_encoder()
+            for i, (cmd, args, kwargs, future) in enumerate(commands):
+                # 逐条入队并预先编码参数：非事务时单条命令的错误只影响自己的future
+                try:
+                    getattr(pipe, cmd)(*args, **kwargs)
+                    for arg in pipe.command_stack[-1][0]:
+                        encoder.encode(arg)
+                except Exception as e:
+                    if transaction:
+                        # 事务：任一命令失败则整批不执行（all-or-nothing）
+                        raise
+                    if len(pipe.command_stack) > len(queued):
+                        pipe.command_stack.pop()
+                    results[i] = e
+                    future.set_exception(e)
+                    continue
+                queued.append(i)
+            if queued:
+                for i, result in zip(queued, pipe.execute(raise_on_error=False), strict=True):
+                    results[i] = result
+    except Exception as e:
+        failed = True
+        for *_, future in commands:
+            if not future.done():
+                future.set_exception(e)
+        raise
+    finally:
+        if redis_cli.metrics is not None:
+            # 管道不经过execute_command：各命令按整批往返耗时记录
+            elapsed = time.perf_counter() - start
+            for (cmd, *_), result in zip(commands, results, strict=True):
+                redis_cli.metrics.observe_command(cmd.upper(), elapsed, failed or isinstance(result, Exception))
+    for cmd, args, _, _ in commands:
+        redis_cli._invalidate_written(cmd, args)
+    for i in queued:
+        future, result = commands[i][3], results[i]
+        if isinstance(result, Exception):
+            future.set_exception(result)
+        else:
+            future.set_result(result)
+    return results
@@ -0,0 +1,41 @@
+"""
+@author axiner
+@version v1.0.0
+@created 2026/10/16 10:00
+@abstract
+@description
+@history
+"""
+
+import inspect
+
+from toollib.tcli.base import BaseCmd
+from toollib.tcli.commands.plugins import benchmark
+from toollib.tcli.option import Arg, Options
+
+targets = ["snowflake", "redisuid", "semaphore", "kvalue-batch", "kvalue-profile", "kvalue-codec"]
+
+
+class Cmd(BaseCmd):
+    def add_options(self):
+        options = Options(
+            name="bench",
+            desc="性能基准",
+            optional={
+                self.bench: [
+                    Arg("-t", "--target", required=True, choices=targets, help="基准目标"),
+                    Arg("-n", "--number", type=int, help="操作次数（默认按各目标）"),
+                    Arg("--threads", default=8, type=int, help="线程数"),
+                    Arg("--redis", default="fake", type=str, help="redis地址（host:port，默认fake-使用fakeredis）"),
+                    Arg("--profile", choices=["default", "performance"], help="kvalue连接配置（kvalue-batch）"),
+                ]
+            },
+        )
+        return options
+
+    def bench(self):
+        func = getattr(benchmark, self.parse_args.target.replace("-", "_"))
+        # 仅传入目标支持且已指定的参数（未指定则使用目标的默认值）
+        params = inspect.signature(func).parameters
+        kwargs = {k: v for k, v in vars(self.parse_args).items() if k in params and v is not None}
+        func(**kwargs)
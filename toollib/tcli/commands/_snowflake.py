@@ -7,8 +7,10 @@
 @history
 """
 
+import os
+
 from toollib.tcli.base import BaseCmd
-from toollib.tcli.commands.plugins import snowflake_service
+from toollib.tcli.commands.plugins import snowflake_bench
 from toollib.tcli.option import Arg, Options
 
 
@@ -22,6 +24,11 @@ class Cmd(BaseCmd):
                     Arg("--host", default="0.0.0.0", type=str, help="host"),
                     Arg("--port", default=9000, type=int, help="port"),
                     Arg("--workers", default=4, type=int, help="进程数"),
+                    Arg("--lease-dir", type=str, help="worker_id租约目录（默认系统临时目录）"),
+                    Arg("--bench", action="store_true", help="压测已启动的服务"),
+                    Arg("--count", default=1, type=int, help="压测每次请求的id数量"),
+                    Arg("--concurrency", default=8, type=int, help="压测并发数"),
+                    Arg("--duration", default=10, type=float, help="压测持续时间（秒）"),
                 ]
             },
         )
@@ -30,6 +37,20 @@ class Cmd(BaseCmd):
     def snowflake(self):
         host = self.parse_args.host
         port = self.parse_args.port
+        if self.parse_args.bench:
+            snowflake_bench.run(
+                host=host,
+                port=port,
+                count=self.parse_args.count,
+                concurrency=self.parse_args.concurrency,
+                duration=self.parse_args.duration,
+            )
+            return
+        if self.parse_args.lease_dir:
+            # 需在导入服务模块前设置（workers=1时uvicorn复用已导入的模块）
+            os.environ["SNOWFLAKE_LEASE_DIR"] = self.parse_args.lease_dir
+        from toollib.tcli.commands.plugins import snowflake_service
+
         workers = self.parse_args.workers
         snowflake_service.run(
             host=host,
@@ -0,0 +1,254 @@
+"""
+@author axiner
+@version v1.0.0
+@created 2026/10/16 10:00
+@abstract 性能基准
+@description
+@history
+"""
+
+import threading
+import time
+from collections.abc import Callable
+
+
+def _run_threads(func: Callable[[int], list | None], number: int, threads: int) -> tuple[float, list]:
+    """number 平均分给各线程执行 func(n)，返回 (耗时, 各线程结果)"""
+    per_thread = [number // threads + (1 if i < number % threads else 0) for i in range(threads)]
+    results = [None] * threads
+    barrier = threading.Barrier(threads + 1)
+
+    def _worker(i: int):
+        barrier.wait()
+        results[i] = func(per_thread[i])
+
+    workers = [threading.Thread(target=_worker, args=(i,), daemon=True) for i in range(threads)]
+    for t in workers:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in workers:
+        t.join()
+    return time.perf_counter() - start, results
+
+
+def _redis_cli(redis: str):
+    """fake-使用fakeredis（本地替身），否则为 host:port"""
+    from toollib.rediscli import RedisCli
+
+    if redis == "fake":
+        try:
+            import fakeredis
+        except ImportError as err:
+            raise ImportError(f"{err} (pip install fakeredis[lua])") from err
+        return RedisCli(connection_class=fakeredis.FakeConnection, server=fakeredis.FakeServer())
+    host, _, port = redis.rpartition(":")
+    return RedisCli(host=host or "127.0.0.1", port=int(port or 6379))
+
+
+def _report(name: str, number: int, elapsed: float, extra: str = ""):
+    print(f"{name:<36} {number:>10} ops  {elapsed:>8.3f}s  {number / elapsed:>12.0f} ops/s{extra}")
+
+
+def snowflake(number: int = 1000000, threads: int = 8):
+    """
+    雪花id：多线程唯一性与吞吐（单线程/多线程逐个生成、多线程批量生成）
+    :param number: 生成数量
+    :param threads: 线程数
+    :return:
+    """
+    from toollib.guid import SnowFlake
+
+    snow = SnowFlake()
+    for name, n_threads, func in (
+        ("gen_uid x1 thread", 1, lambda n: [snow.gen_uid() for _ in range(n)]),
+        (f"gen_uid x{threads} threads", threads, lambda n: [snow.gen_uid() for _ in range(n)]),
+        (f"gen_uids(1000) x{threads} threads", threads, lambda n: _gen_batches(snow, n, 1000)),
+    ):
+        elapsed, results = _run_threads(func, number, n_threads)
+        uids = [uid for result in results for uid in result]
+        duplicates = len(uids) - len(set(uids))
+        _report(name, len(uids), elapsed, f"  duplicates: {duplicates}")
+        if duplicates:
+            raise RuntimeError(f"{name}: {duplicates} duplicate ids")
+
+
+def _gen_batches(snow, n: int, size: int) -> list:
+    uids = []
+    while n > 0:
+        uids.extend(snow.gen_uids(min(n, size)))
+        n -= size
+    return uids
+
+
+def redisuid(number: int = 100000, threads: int = 8, redis: str = "fake"):
+    """
+    RedisUid：原多次往返路径（ttl/set/expireat/incrby）对比单次往返Lua脚本及号段预取
+    :param number: 生成数量
+    :param threads: 线程数
+    :param redis: redis地址（fake-使用fakeredis）
+    :return:
+    """
+    from toollib.guid import RedisUid
+
+    redis_cli = _redis_cli(redis)
+    legacy = RedisUid(redis_cli, seq_name="bench:ruid:legacy")
+    lua = RedisUid(redis_cli, seq_name="bench:ruid:lua")
+    prefetch = RedisUid(redis_cli, seq_name="bench:ruid:prefetch", prefetch=1000)
+    for name, func in (
+        ("legacy (4 round trips)", lambda n: [_legacy_gen_uid(legacy) for _ in range(n)]),
+        ("lua (1 round trip)", lambda n: [lua.gen_uid() for _ in range(n)]),
+        ("lua + prefetch(1000)", lambda n: [prefetch.gen_uid() for _ in range(n)]),
+    ):
+        elapsed, results = _run_threads(func, number, threads)
+        uids = [uid for result in results for uid in result]
+        _report(f"{name} x{threads}", len(uids), elapsed, f"  duplicates: {len(uids) - len(set(uids))}")
+    redis_cli.delete("bench:ruid:legacy", "bench:ruid:lua", "bench:ruid:prefetch")
+
+
+def _legacy_gen_uid(ruid) -> str:
+    # 原实现：先检查再初始化（存在竞态），每个id多次往返
+    redis_cli = ruid.redis_cli
+    if redis_cli.ttl(ruid.seq_name) < 0:
+        redis_cli.set(ruid.seq_name, ruid.seq_beg)
+        redis_cli.expireat(ruid.seq_name, ruid._set_ex(ruid.seq_ex))
+    return ruid._format_uid(redis_cli.incrby(ruid.seq_name, 1))
+
+
+def semaphore(number: int = 10000, threads: int = 8, redis: str = "fake"):
+    """
+    信号量与限流：acquire/release、try_acquire吞吐（每次操作一次Lua调用）
+    :param number: 操作次数
+    :param threads: 线程数
+    :param redis: redis地址（fake-使用fakeredis）
+    :return:
+    """
+    from toollib.locker import RateLimiter, Semaphore
+
+    redis_cli = _redis_cli(redis)
+    for limit in (threads, max(threads // 2, 1)):
+
+        def _sem(n: int, limit: int = limit) -> list:
+            sem = Semaphore(redis_cli, lock_name="bench:semaphore", limit=limit, acquire_timeout=30, timeout=30)
+            acquired = 0
+            for _ in range(n):
+                if sem.acquire():
+                    acquired += 1
+                    sem.release()
+            return [acquired]
+
+        elapsed, results = _run_threads(_sem, number, threads)
+        _report(f"semaphore(limit={limit}) x{threads}", number, elapsed, f"  acquired: {sum(r[0] for r in results)}")
+    for algorithm in ("token_bucket", "sliding_window"):
+        # 速率足够大，仅测Lua调用开销
+        limiter = RateLimiter(redis_cli, name=f"bench:ratelimiter:{algorithm}", rate=number * 10, algorithm=algorithm)
+        elapsed, results = _run_threads(lambda n, limiter=limiter: [limiter.allow() for _ in range(n)], number, threads)
+        allowed = sum(sum(result) for result in results)
+        _report(f"ratelimiter({algorithm}) x{threads}", number, elapsed, f"  allowed: {allowed}")
+
+
+def kvalue_batch(number: int = 100000, profile: str = "default"):
+    """
+    KValue：逐个 set/get/delete（每个key一个事务）对比 set_many/get_many/delete_many（单个事务）
+    :param number: key数量（逐个操作最多取5000个，避免耗时过长）
+    :param profile: 连接配置
+    :return:
+    """
+    from toollib.kvalue import KValue
+
+    kv = KValue(profile=profile)
+    try:
+        single = min(number, 5000)
+        mapping = {f"k{i}": {"id": i, "name": f"name-{i}"} for i in range(number)}
+        keys = list(mapping)
+        for name, n, func in (
+            ("set x1", single, lambda: [kv.set(k, mapping[k]) for k in keys[:single]]),
+            ("get x1", single, lambda: [kv.get(k) for k in keys[:single]]),
+            ("delete x1", single, lambda: [kv.delete(k) for k in keys[:single]]),
+            ("set_many", number, lambda: kv.set_many(mapping)),
+            ("get_many", number, lambda: kv.get_many(keys)),
+            ("exists_many", number, lambda: kv.exists_many(keys)),
+            ("delete_many", number, lambda: kv.delete_many(keys)),
+        ):
+            start = time.perf_counter()
+            func()
+            _report(f"kvalue({profile}) {name}", n, time.perf_counter() - start)
+    finally:
+        kv.remove()
+
+
+def kvalue_profile(number: int = 5000, threads: int = 8):
+    """
+    KValue：各连接配置（default/performance）的 set/get 吞吐，及写入期间多线程读取
+    :param number: key数量
+    :param threads: 写入期间的读取线程数
+    :return:
+    """
+    from toollib.kvalue import KValue
+
+    for profile in KValue._profiles:
+        kv = KValue(profile=profile, thread_local=True)
+        try:
+            _kvalue_profile(kv, profile, number, threads)
+        finally:
+            kv.remove()
+
+
+def _kvalue_profile(kv, profile: str, number: int, threads: int):
+    keys = [f"k{i}" for i in range(number)]
+    start = time.perf_counter()
+    for key in keys:
+        kv.set(key, {"key": key})
+    _report(f"kvalue({profile}) set", number, time.perf_counter() - start)
+    start = time.perf_counter()
+    for key in keys:
+        kv.get(key)
+    _report(f"kvalue({profile}) get", number, time.perf_counter() - start)
+    stopped = threading.Event()
+    writer = threading.Thread(target=lambda: [kv.set(k, 0) for k in keys if not stopped.is_set()], daemon=True)
+    writer.start()
+    elapsed, _ = _run_threads(lambda n: [kv.get(keys[i % number]) for i in range(n)], number, threads)
+    stopped.set()
+    writer.join()
+    _report(f"kvalue({profile}) get x{threads} (writing)", number, elapsed)
+
+
+def kvalue_codec(number: int = 2000):
+    """
+    KValue：各编解码器/压缩在不同大小值上的 set/get 吞吐与存储大小
+    :param number: 每种大小的操作次数（大值按比例减少）
+    :return:
+    """
+    from toollib.kvalue import KValue
+
+    for size in (100, 10_000, 1_000_000):
+        value = {"items": [{"id": i, "name": f"name-{i:08d}", "score": i / 7} for i in range(max(size // 50, 1))]}
+        n = max(number * 1000 // max(size, 1000), 3)
+        for codec, compress in (
+            ("json", None),
+            ("msgpack", None),
+            ("pickle", None),
+            ("json", "zlib"),
+            ("json", "zstd"),
+            ("msgpack", "zstd"),
+        ):
+            name = f"kvalue {codec}{'+' + compress if compress else ''} ~{size}B"
+            try:
+                kv = KValue(profile="performance", codec=codec, compress=compress)
+            except ImportError as e:
+                print(f"{name:<36} skipped: {e}")
+                continue
+            try:
+                start = time.perf_counter()
+                for i in range(n):
+                    kv.set(f"k{i}", value)
+                set_elapsed = time.perf_counter() - start
+                start = time.perf_counter()
+                for i in range(n):
+                    kv.get(f"k{i}")
+                get_elapsed = time.perf_counter() - start
+                stored = kv.fetchone(f"select length(value) from {kv.tbname} limit 1")[0]
+                _report(f"{name} set", n, set_elapsed, f"  stored: {stored}B")
+                _report(f"{name} get", n, get_elapsed)
+            finally:
+                kv.remove()
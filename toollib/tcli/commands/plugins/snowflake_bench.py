@@ -0,0 +1,68 @@
+"""
+@author axiner
+@version v1.0.0
+@created 2026/10/16 10:00
+@abstract 雪花算法服务压测
+@description
+@history
+"""
+
+import http.client
+import threading
+import time
+
+
+def _worker(host: str, port: int, path: str, deadline: float, stats: list):
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    requests, errors = 0, 0
+    try:
+        while time.perf_counter() < deadline:
+            try:
+                conn.request("GET", path)
+                resp = conn.getresponse()
+                resp.read()
+                if resp.status == 200:
+                    requests += 1
+                else:
+                    errors += 1
+            except (OSError, http.client.HTTPException):
+                errors += 1
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=10)
+    finally:
+        conn.close()
+    stats.append((requests, errors))
+
+
+def run(host: str, port: int, count: int = 1, concurrency: int = 8, duration: float = 10):
+    """
+    压测（长连接并发请求，统计requests/s与ids/s）
+    :param host: host
+    :param port: port
+    :param count: 每次请求的id数量（1则请求/gen-snowid，否则请求/gen-snowids）
+    :param concurrency: 并发数
+    :param duration: 持续时间（秒）
+    :return:
+    """
+    if host in ("0.0.0.0", ""):
+        host = "127.0.0.1"
+    path = "/gen-snowid" if count <= 1 else f"/gen-snowids?count={count}"
+    stats = []
+    start = time.perf_counter()
+    deadline = start + duration
+    threads = [
+        threading.Thread(target=_worker, args=(host, port, path, deadline, stats), daemon=True)
+        for _ in range(concurrency)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    requests = sum(s[0] for s in stats)
+    errors = sum(s[1] for s in stats)
+    print(f"url: http://{host}:{port}{path}")
+    print(f"concurrency: {concurrency}, duration: {elapsed:.2f}s")
+    print(f"requests: {requests}, errors: {errors}")
+    print(f"requests/s: {requests / elapsed:.2f}")
+    print(f"ids/s: {requests * max(count, 1) / elapsed:.2f}")
@@ -9,19 +9,42 @@
 
 import os
 import sys
+import tempfile
+from contextlib import asynccontextmanager
 
 from toollib.guid import SnowFlake
 
 try:
     import uvicorn
-    from fastapi import FastAPI
+    from fastapi import FastAPI, HTTPException
+    from fastapi.responses import StreamingResponse
 except ImportError as err:
     sys.stderr.write(f"ERROR: {err}\n")
     sys.exit(1)
 
-app = FastAPI()
+snow: SnowFlake = None  # type: ignore[assignment]
 
-snow = SnowFlake(epoch_timestamp=int(os.environ.setdefault("epoch-timestamp", "1288834974657")))
+
+@asynccontextmanager
+async def lifespan(_app):
+    # 在worker进程启动时创建（租约由worker持有，主进程不占用slot）
+    global snow
+    snow = SnowFlake(
+        epoch_timestamp=int(os.environ.setdefault("epoch-timestamp", "1288834974657")),
+        lease_dir=os.environ.get("SNOWFLAKE_LEASE_DIR") or os.path.join(tempfile.gettempdir(), "snowflake-lease"),
+    )
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
+
+max_count = int(os.environ.setdefault("max-count", "10000"))
+max_stream_count = int(os.environ.setdefault("max-stream-count", "1000000"))
+
+
+def _check_count(count: int, limit: int):
+    if count < 1 or count > limit:
+        raise HTTPException(status_code=400, detail=f"count only supported: 1 ~ {limit}")
 
 
 @app.get("/gen-snowid")
@@ -30,5 +53,27 @@ async def gen_snowid(to_str: bool = False):
     return {"snowid": snowid}
 
 
+@app.get("/gen-snowids")
+async def gen_snowids(count: int = 1, to_str: bool = False):
+    _check_count(count, max_count)
+    snowids = snow.gen_uids(count, to_str=to_str)
+    return {"snowids": snowids}
+
+
+@app.get("/gen-snowids/stream")
+async def gen_snowids_stream(count: int = 1, to_str: bool = False):
+    _check_count(count, max_stream_count)
+    fmt = '{"snowid":"%s"}\n' if to_str else '{"snowid":%d}\n'
+
+    async def _iter():
+        remaining = count
+        while remaining > 0:
+            chunk = min(remaining, 4096)
+            yield "".join(fmt % uid for uid in snow.iter_uids(chunk, to_str=False))
+            remaining -= chunk
+
+    return StreamingResponse(_iter(), media_type="application/x-ndjson")
+
+
 def run(host: str, port: int, workers: int):
     uvicorn.run(f"{__name__}:app", host=host, port=port, workers=workers)
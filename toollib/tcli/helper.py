@@ -24,6 +24,7 @@ Commands:
   bash              bash模板
   grpc              grpc模板
   pkgup             包更新
+  bench             性能基准
 """
 
 set_pip = """usage:
@@ -95,6 +96,11 @@ options:
   --host            host[可选]
   --port            port[可选]
   --workers         进程数[可选]
+  --lease-dir       worker_id租约目录[可选]
+  --bench           压测已启动的服务[可选]
+  --count           压测每次请求的id数量[可选]
+  --concurrency     压测并发数[可选]
+  --duration        压测持续时间（秒）[可选]
 """
 
 bash = """usage:
@@ -123,3 +129,14 @@ options:
   --sep                 分隔符（默认==）[可选]
   --overwrite           是否覆盖[可选]
 """
+
+bench = """usage:
+  pytcli bench [options]
+options:
+  -h/--help     帮助
+  -t/--target   基准目标（snowflake|redisuid|semaphore|kvalue-batch|kvalue-profile|kvalue-codec）
+  -n/--number   操作次数（默认按各目标）[可选]
+  --threads     线程数[可选]
+  --redis       redis地址（host:port，默认fake-使用fakeredis）[可选]
+  --profile     kvalue连接配置（default|performance，kvalue-batch）[可选]
+"""